@@ -0,0 +1,113 @@
+import os
+import sys
+import time
+import tracemalloc
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.func.scraping_functions as scraping
+from bench import synthetic
+
+
+'''
+Micro-benchmark of html extraction: whole page parsed with BeautifulSoup (as before) against targeted parsing with SoupStrainer.
+Run from repo root:
+    python bench/bench_parsing.py [fixtures_dir]
+fixtures_dir may contain saved pages ranking.html, profile.html and stats.html. Synthetic pages are used for missing ones.
+'''
+
+
+def full_players_url(page):
+    players_urls = {}
+    for player in BeautifulSoup(page, features="lxml").find('tbody').find_all('a'):
+        players_urls.setdefault(player.text, player['href'])
+    return players_urls
+
+
+def full_player_profile(page):
+    table = BeautifulSoup(page, features="lxml").find_all('table', class_='table table-condensed text-nowrap')[0]
+    return {row.find('th').text: row.find('td').text for row in table.find_all('tr')}
+
+
+def full_player_stats(page):
+    temp_dict = {}
+    for table in BeautifulSoup(page, features="lxml").find_all('table', class_='table table-condensed table-hover table-striped')[0:3]:
+        for row in table.find_all('tr')[1:]:
+            temp_dict[row.find('td').text] = row.find('th').text
+    return temp_dict
+
+
+def measure(func, page, repeat = 5):
+    '''
+    Best wall time over repeat runs and peak memory allocated by one run
+
+    Args:
+        func(callable): extractor
+        page(str): html
+        repeat(int): number of timed runs
+
+    Returns:
+        seconds(float), peak(int), result
+
+    '''
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(page)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(page)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return best, peak, result
+
+
+def load_pages(fixtures_dir):
+    '''
+    Saved pages from fixtures_dir, synthetic ones if not found
+
+    Args:
+        fixtures_dir(str): folder with saved pages, optional
+
+    Returns:
+        pages(dict): Keys: page kind, Values: html
+
+    '''
+
+    pages = {'ranking': synthetic.ranking_page(), 'profile': synthetic.player_page(), 'stats': synthetic.player_page()}
+
+    if fixtures_dir is not None:
+        for kind in pages:
+            path = os.path.join(fixtures_dir, f'{kind}.html')
+            if os.path.exists(path):
+                with open(path, 'r') as fp:
+                    pages[kind] = fp.read()
+
+    return pages
+
+
+def main(fixtures_dir = None):
+
+    pages = load_pages(fixtures_dir)
+
+    cases = [('ranking', full_players_url, lambda page: scraping.parse_players_url(page, {})),
+             ('profile', full_player_profile, scraping.parse_player_profile),
+             ('stats', full_player_stats, scraping.parse_player_stats)]
+
+    print(f'{"page":<10}{"kB":>8}{"full ms":>10}{"strained ms":>13}{"full peak kB":>14}{"strained peak kB":>18}')
+    for kind, full, strained in cases:
+        page = pages[kind]
+        full_time, full_peak, full_result = measure(full, page)
+        strained_time, strained_peak, strained_result = measure(strained, page)
+        assert full_result == strained_result, f'{kind}: strained parsing gives different data'
+
+        print(f'{kind:<10}{len(page) / 1024:>8.0f}{full_time * 1000:>10.2f}{strained_time * 1000:>13.2f}'
+              f'{full_peak / 1024:>14.0f}{strained_peak / 1024:>18.0f}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
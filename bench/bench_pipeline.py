@@ -0,0 +1,275 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from PIL import Image
+import seaborn #imported once here so first plot timed does not include it
+import src.func.cleaning_functions as cleaning
+import src.func.scraping_functions as scraping
+from src.func.render_functions import timed_render #sets Agg backend
+from src.func.plotting_functions import Plot
+from src.func.query_functions import MatchIndex
+from src.func.rating_functions import EloRatings
+from bench import synthetic
+from bench.bench_parsing import load_pages
+
+
+'''
+Benchmark of the pipeline stages on synthetic datasets of growing size: wall time and peak memory of each stage.
+Results are saved as json, to compare them between commits. Run from repo root:
+    python bench/bench_pipeline.py --sizes 1000 100000 10000000
+    python bench/bench_pipeline.py --compare bench/results/<previous commit>.json
+'''
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(func, memory = True):
+    '''
+    Wall time of one run and peak memory allocated by a second run, traced with tracemalloc (which slows it down)
+
+    Args:
+        func(callable): stage to measure
+        memory(bool): measure peak memory, runs stage twice
+
+    Returns:
+        result(dict): seconds and peak_mb, or error message if stage failed
+        value: returned by func, None if it failed
+
+    '''
+
+    start = time.perf_counter()
+    try:
+        value = func()
+    except Exception as error:
+        return {'error': f'{type(error).__name__}: {error}'}, None
+    result = {'seconds': time.perf_counter() - start}
+
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            result['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+
+    return result, value
+
+
+def make_pictures(names, folder):
+    '''
+    Tiny picture for each player, where plots look for them (src/img/{surname}.jpg)
+
+    Args:
+        names(iterable): names of players as in players stats
+        folder(str): working folder of plots
+
+    Returns:
+
+    '''
+
+    os.makedirs(os.path.join(folder, 'src', 'img'), exist_ok = True)
+    picture = os.path.join(folder, 'picture.jpg')
+    Image.new('RGB', (32, 32), 'grey').save(picture)
+
+    for name in names:
+        parts = str(name).split()
+        if len(parts) > 1:
+            shutil.copyfile(picture, os.path.join(folder, 'src', 'img', f'{parts[1]}.jpg'))
+
+
+def bench_size(n_rows, n_players, workdir, memory = True):
+    '''
+    Generates Data.csv and players_info.json with n_rows each and measures every stage on them
+
+    Args:
+        n_rows(int): games in Data.csv and players in players_info.json
+        n_players(int): different players in Data.csv
+        workdir(str): folder for generated files and plots
+        memory(bool): measure peak memory
+
+    Returns:
+        results(dict): Keys: stage, Values: result of measure
+
+    '''
+
+    kaggle_path = os.path.join(workdir, 'Data.csv')
+    players_path = os.path.join(workdir, 'players_info.json')
+    kaggle_names = synthetic.kaggle_dataset(kaggle_path, n_rows, n_players)
+    full_names = synthetic.players_info(players_path, max(n_rows, n_players))
+    main_player = kaggle_names[0] #plays most games
+
+    results = {}
+
+    results['read_kaggle_dataset'], df = measure(lambda: cleaning.read_kaggle_dataset(kaggle_path), memory)
+    results['filter_games'], _ = measure(lambda: cleaning.filter_games(df, main_player), memory)
+    results['long_format'], df_long = measure(lambda: cleaning.long_format(df), memory)
+
+    results['build_match_index'], index = measure(lambda: MatchIndex.from_games(df), memory)
+    if index is not None:
+        pairs = df[['Winner', 'Loser']].sample(10000, replace = True, random_state = 0)
+        results['head_to_head_10k_pairs'], _ = measure(lambda: index.query(pairs.Winner.to_list(), pairs.Loser.to_list(), 'Clay', 2010), memory)
+    results['elo_ratings'], _ = measure(lambda: EloRatings().update(df), memory)
+    del df, index
+
+    df_1 = pd.read_json(players_path)
+    results['coerce_player_stats'], _ = measure(lambda: cleaning.coerce_player_stats(df_1.copy()), memory)
+    df_1 = cleaning.clean_players_info(df_1)
+
+    results['match_id_players'], _ = measure(lambda: cleaning.match_id_players(df_long, df_1), memory)
+    del df_long
+
+    results['prepare_dataset'], prepared = measure(lambda: cleaning.prepare_dataset(kaggle_path, players_path, [main_player]), memory)
+    if prepared is None:
+        return results
+
+    clean_df, df_players, registry = prepared
+    results['build_aggregates'], agg_df = measure(lambda: cleaning.build_aggregates(clean_df), memory)
+
+    #plots look for pictures relative to working folder
+    Plot.registry = registry
+    make_pictures(list(registry.decode(agg_df.Opponent.unique())) + full_names[:1], workdir)
+    output_dir = os.path.join(workdir, 'img')
+    os.makedirs(output_dir, exist_ok = True)
+
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        for plot_name in Plot.FILENAMES:
+            if plot_name == 'plot_box_aces':
+                plot = lambda: Plot.plot_box_aces(df_players, full_names[0], output_dir)
+            else:
+                plot = lambda: getattr(Plot, plot_name)(agg_df, output_dir)
+            results[plot_name], _ = measure(lambda: check_render(timed_render(plot)), memory)
+    finally:
+        os.chdir(cwd)
+
+    return results
+
+
+def check_render(result):
+    '''
+    Raises error of a failed render so measure records it
+
+    Args:
+        result(float or str): from timed_render
+
+    Returns:
+        result(float)
+
+    '''
+
+    if isinstance(result, str):
+        raise RuntimeError(result)
+
+    return result
+
+
+def bench_parsing(fixtures_dir, memory = True):
+    '''
+    Measures html extractors on saved pages (synthetic ones if not found), independent of dataset size
+
+    Args:
+        fixtures_dir(str): folder with ranking.html, profile.html and stats.html, optional
+        memory(bool): measure peak memory
+
+    Returns:
+        results(dict): Keys: extractor, Values: result of measure
+
+    '''
+
+    pages = load_pages(fixtures_dir)
+
+    return {'parse_players_url': measure(lambda: scraping.parse_players_url(pages['ranking'], {}), memory)[0],
+            'parse_player_profile': measure(lambda: scraping.parse_player_profile(pages['profile']), memory)[0],
+            'parse_player_stats': measure(lambda: scraping.parse_player_stats(pages['stats']), memory)[0]}
+
+
+def commit():
+    '''
+    Short hash of current commit, 'unknown' outside a git repo
+    '''
+
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd = ROOT, capture_output = True, text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results, previous):
+    '''
+    Prints ratio of time and memory of each stage against results of a previous run
+
+    Args:
+        results(dict): current results
+        previous(dict): results loaded from json
+
+    Returns:
+
+    '''
+
+    print(f'\nAgainst {previous["commit"]} (ratio > 1 is slower or bigger now)')
+    for size, stages in results['results'].items():
+        for stage, result in stages.items():
+            before = previous['results'].get(size, {}).get(stage, {})
+            if 'seconds' not in result or 'seconds' not in before:
+                continue
+            line = f'{size:>10}  {stage:<28}{result["seconds"] / before["seconds"]:>8.2f}x time'
+            if 'peak_mb' in result and before.get('peak_mb'):
+                line += f'{result["peak_mb"] / before["peak_mb"]:>8.2f}x memory'
+            print(line)
+
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(description = 'Benchmark of pipeline stages on synthetic datasets')
+    parser.add_argument('--sizes', type = int, nargs = '+', default = [1000, 10000, 100000], help = 'rows of generated datasets, up to 10000000')
+    parser.add_argument('--players', type = int, default = 2000, help = 'different players in generated Data.csv')
+    parser.add_argument('--fixtures', help = 'folder with saved html pages')
+    parser.add_argument('--no-memory', action = 'store_true', help = 'only wall time, each stage runs once')
+    parser.add_argument('--output', help = 'json file for results, by default bench/results/<commit>.json')
+    parser.add_argument('--compare', help = 'json file of a previous run')
+    args = parser.parse_args(argv)
+
+    memory = not args.no_memory
+    results = {'commit': commit(), 'python': platform.python_version(), 'pandas': pd.__version__,
+               'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'results': {}}
+
+    results['results']['parsing'] = bench_parsing(args.fixtures, memory)
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            results['results'][str(size)] = bench_size(size, min(args.players, size), workdir, memory)
+
+    print(f'{"size":>10}  {"stage":<28}{"seconds":>10}{"peak MB":>10}')
+    for size, stages in results['results'].items():
+        for stage, result in stages.items():
+            if 'error' in result:
+                print(f'{size:>10}  {stage:<28}  {result["error"]}')
+            else:
+                print(f'{size:>10}  {stage:<28}{result["seconds"]:>10.3f}{result.get("peak_mb", float("nan")):>10.1f}')
+
+    output = args.output or os.path.join(ROOT, 'bench', 'results', f'{results["commit"]}.json')
+    os.makedirs(os.path.dirname(output), exist_ok = True)
+    with open(output, 'w') as fp:
+        json.dump(results, fp, indent = 4)
+    print(f'\nResults saved in {output}')
+
+    if args.compare:
+        with open(args.compare, 'r') as fp:
+            compare(results, json.load(fp))
+
+
+if __name__ == '__main__':
+    main()
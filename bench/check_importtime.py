@@ -0,0 +1,81 @@
+import os
+import sys
+import subprocess
+
+
+'''
+Import time budget of command line entry point and of each stage, measured with python -X importtime.
+Fails (exit code 1) if an import takes longer than its budget or loads a library belonging to another stage.
+Run from repo root:
+    python bench/check_importtime.py [scale]
+scale multiplies all budgets, for slower machines (by default 1).
+'''
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ['pandas', 'numpy', 'matplotlib', 'seaborn', 'selenium', 'requests', 'bs4']
+
+#module: (budget in ms, heavy libraries it must not import)
+BUDGETS = {'main': (100, HEAVY), #menu and --help load no stage
+           'src.scrape': (600, ['pandas', 'matplotlib', 'seaborn', 'selenium', 'requests']), #backend library loaded when scraping starts
+           'src.clean': (1000, ['matplotlib', 'seaborn', 'selenium', 'requests', 'bs4']),
+           'src.plot': (2000, ['seaborn', 'selenium', 'requests', 'bs4']), #seaborn loaded by charts using it
+           'src.batch': (2000, ['seaborn', 'selenium', 'requests', 'bs4'])}
+
+
+def import_time(module, repeat = 3):
+    '''
+    Imports a module in a new interpreter with -X importtime
+
+    Args:
+        module(str): module to import
+        repeat(int): number of interpreters, best time is kept
+
+    Returns:
+        ms(float): best cumulative import time of module
+        imported(set): top level packages imported
+
+    '''
+
+    best = float('inf')
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                cwd = ROOT, capture_output = True, text = True, check = True)
+
+        imported = set()
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line.split('|')
+            imported.add(name.strip().split('.')[0])
+            if name.strip() == module:
+                best = min(best, int(cumulative) / 1000)
+
+    return best, imported
+
+
+def main(scale = 1):
+
+    failed = False
+
+    print(f'{"module":<12}{"ms":>10}{"budget":>10}  heavy libraries')
+    for module, (budget, forbidden) in BUDGETS.items():
+        ms, imported = import_time(module)
+        heavy = sorted(imported.intersection(HEAVY))
+        unexpected = sorted(imported.intersection(forbidden))
+
+        print(f'{module:<12}{ms:>10.1f}{budget * scale:>10.0f}  {", ".join(heavy) or "-"}')
+
+        if ms > budget * scale:
+            print(f'    over budget by {ms - budget * scale:.1f} ms')
+            failed = True
+        if unexpected:
+            print(f'    should not import {", ".join(unexpected)}')
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(float(sys.argv[1]) if len(sys.argv) > 1 else 1))
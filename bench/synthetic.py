@@ -0,0 +1,254 @@
+import random
+
+
+'''
+Synthetic inputs shaped like the real ones, to benchmark the pipeline without scraping or downloading anything
+'''
+
+
+PROFILE_FIELDS = ['Age', 'Country', 'Height', 'Weight', 'Plays', 'Backhand', 'Turned Pro', 'Coach']
+
+STATS_SECTIONS = {'Serve': ['Ace %', 'Double Fault %', '1st Serve %', '1st Serve Won %', '2nd Serve Won %',
+                            'Break Points Saved %', 'Service Points Won %', 'Service Games Won %'],
+                  'Return': ['Ace Against %', 'Double Fault Against %', '1st Srv. Return Won %', '2nd Srv. Return Won %',
+                             'Break Points Won %', 'Return Points Won %', 'Return Games Won %'],
+                  'Total': ['Points Dominance', 'Games Dominance', 'Break Points Ratio', 'Total Points Won %',
+                            'Games Won %', 'Sets Won %', 'Matches Won %']}
+
+
+def page_padding(n_blocks):
+    '''
+    Navigation, scripts and other html around the tables we want, as in the real pages
+
+    Args:
+        n_blocks(int): number of blocks of filler content
+
+    Returns:
+        html(str)
+
+    '''
+
+    block = ('<div class="row"><div class="col-md-4"><ul class="nav">'
+             + ''.join(f'<li><a href="/page{i}">Link {i}</a></li>' for i in range(20))
+             + '</ul></div><script>var data = ' + '[1,2,3],' * 50 + '0;</script></div>')
+
+    return block * n_blocks
+
+
+def ranking_page(n_players = 500, seed = 0):
+    '''
+    Rankings page with table of n_players
+
+    Args:
+        n_players(int): rows in ranking table
+        seed(int): random seed
+
+    Returns:
+        html(str)
+
+    '''
+
+    rng = random.Random(seed)
+    rows = ''.join(f'<tr><td>{rank}</td><td><a href="/playerProfile?playerId={rng.randint(1, 10**5)}">Player{rank} Surname{rank}</a></td>'
+                   f'<td>{rng.randint(1, 12000)}</td></tr>' for rank in range(1, n_players + 1))
+
+    return (f'<html><head><title>Rankings</title></head><body>{page_padding(40)}'
+            f'<table id="rankingsTable"><thead><tr><th>Rank</th><th>Name</th><th>Points</th></tr></thead>'
+            f'<tbody>{rows}</tbody></table>{page_padding(20)}</body></html>')
+
+
+def player_page(seed = 0):
+    '''
+    Player page with profile table and statistics tables
+
+    Args:
+        seed(int): random seed
+
+    Returns:
+        html(str)
+
+    '''
+
+    rng = random.Random(seed)
+    profile = ''.join(f'<tr><th>{field}</th><td>{rng.randint(1, 200)}</td></tr>' for field in PROFILE_FIELDS)
+
+    stats = ''
+    for section, fields in STATS_SECTIONS.items():
+        rows = ''.join(f'<tr><td>{field}</td><th>{rng.uniform(0, 100):.1f}%</th></tr>' for field in fields)
+        stats += f'<table class="table table-condensed table-hover table-striped"><tr><th>{section}</th></tr>{rows}</table>'
+
+    return (f'<html><head><title>Player</title></head><body>{page_padding(60)}'
+            f'<table class="table table-condensed text-nowrap">{profile}</table>{page_padding(20)}'
+            f'{stats}{page_padding(40)}</body></html>')
+
+
+FIRST_NAMES = ['Rafael', 'Roger', 'Novak', 'Andy', 'Stan', 'David', 'Pablo', 'Tomas', 'Marin', 'Kei', 'Juan', 'Gael']
+
+SYLLABLES = ['ka', 'ro', 'mi', 'de', 'lo', 'sa', 'vi', 'ne', 'tu', 'ba', 'gor', 'lan', 'ser', 'dal', 'vic', 'ter']
+
+COUNTRIES = ['Spain', 'France', 'Serbia', 'Switzerland', 'Argentina', 'Germany', 'Italy', 'Croatia', 'Japan', 'Australia']
+
+SURFACES = ['Clay', 'Hard', 'Grass', 'Carpet']
+
+
+def surname(i):
+    '''
+    Unique surname for player i, made of syllables
+
+    Args:
+        i(int)
+
+    Returns:
+        surname(str)
+
+    '''
+
+    letters = ''
+    while True:
+        letters += SYLLABLES[i % len(SYLLABLES)]
+        i //= len(SYLLABLES)
+        if i == 0:
+            return letters.capitalize()
+
+
+def player_names(n_players, seed = 0):
+    '''
+    Names of players as scraped ('Name Surname') and as in Kaggle dataset ('Surname N.').
+    Some players have double surnames, some of them hyphenated in Kaggle, as the real ones resolved by other rules.
+
+    Args:
+        n_players(int)
+        seed(int): random seed
+
+    Returns:
+        full_names(list)
+        kaggle_names(list): same order as full_names
+
+    '''
+
+    rng = random.Random(seed)
+    full_names = []
+    kaggle_names = []
+
+    for i in range(n_players):
+        first = rng.choice(FIRST_NAMES)
+        last = surname(i)
+        kind = rng.random()
+
+        if kind < 0.05: #'Carreno Busta' scraped, 'Carreno-Busta P.' in Kaggle
+            last = f'{last} {surname(i + n_players)}'
+            kaggle = f'{last.replace(" ", "-")} {first[0]}.'
+        elif kind < 0.10: #'Bautista Agut' scraped, 'Bautista Agut R.' in Kaggle
+            last = f'{last} {surname(i + n_players)}'
+            kaggle = f'{last} {first[0]}.'
+        else:
+            kaggle = f'{last} {first[0]}.'
+
+        full_names.append(f'{first} {last}')
+        kaggle_names.append(kaggle)
+
+    return full_names, kaggle_names
+
+
+def kaggle_dataset(path, n_rows, n_players = 1000, seed = 0, chunksize = 10**6):
+    '''
+    Writes a csv file shaped like Kaggle Data.csv (with bets columns), written by chunks so size is only limited by disk.
+    Players are picked with a long tail: first players play far more games, as top players do.
+
+    Args:
+        path(str): csv file to write
+        n_rows(int): number of games
+        n_players(int): number of different players
+        seed(int): random seed
+        chunksize(int): rows generated at once
+
+    Returns:
+        kaggle_names(list): Kaggle names of players, first one plays most games
+
+    '''
+
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    _, kaggle_names = player_names(n_players, seed)
+    names = np.array(kaggle_names, dtype = object)
+    weights = 1 / np.sqrt(np.arange(1, n_players + 1))
+    weights /= weights.sum()
+
+    written = 0
+    while written < n_rows:
+        n = min(chunksize, n_rows - written)
+
+        winner = rng.choice(n_players, n, p = weights)
+        loser = rng.integers(0, n_players - 1, n)
+        loser += loser >= winner #never against himself
+
+        year = rng.integers(2000, 2017, n)
+        date = pd.Series(rng.integers(1, 29, n)).map('{:02d}'.format) + '/' + pd.Series(rng.integers(1, 13, n)).map('{:02d}'.format) + '/' + year.astype(str)
+        rank = rng.integers(1, 1500, (n, 2)).astype(str).astype(object)
+        rank[rng.random((n, 2)) < 0.01] = 'NR'
+        games = rng.integers(0, 8, (n, 10))
+        unplayed = np.repeat(rng.random((n, 2)) < 0.8, 2, axis = 1) #most games are best of 3
+        games[:, 6:] = np.where(unplayed, -1, games[:, 6:])
+        games = games.astype(str).astype(object)
+        games[games == '-1'] = ''
+
+        chunk = pd.DataFrame({'ATP': rng.integers(1, 70, n), 'Location': 'Loc', 'Tournament': 'Tournament ' + pd.Series(rng.integers(0, 70, n)).astype(str),
+                              'Date': date, 'Series': rng.choice(['ATP250', 'ATP500', 'Masters 1000', 'Grand Slam'], n),
+                              'Court': rng.choice(['Outdoor', 'Indoor'], n), 'Surface': rng.choice(SURFACES, n, p = [0.35, 0.45, 0.15, 0.05]),
+                              'Round': rng.choice(['1st Round', '2nd Round', 'Quarterfinals', 'Semifinals', 'The Final'], n), 'Best of': 3,
+                              'Winner': names[winner], 'Loser': names[loser], 'WRank': rank[:, 0], 'LRank': rank[:, 1]})
+        for i, column in enumerate(['W1', 'L1', 'W2', 'L2', 'W3', 'L3', 'W4', 'L4', 'W5', 'L5']):
+            chunk[column] = games[:, i]
+        chunk['Wsets'] = 2
+        chunk['Lsets'] = rng.integers(0, 2, n)
+        chunk['Comment'] = 'Completed'
+        chunk['B365W'] = rng.uniform(1, 5, n).round(2)
+        chunk['B365L'] = rng.uniform(1, 5, n).round(2)
+
+        chunk.to_csv(path, mode = 'w' if written == 0 else 'a', header = written == 0, index = False)
+        written += n
+
+    return kaggle_names
+
+
+def players_info(path, n_players, seed = 0):
+    '''
+    Writes a json file shaped like scraped players_info.json: profile and stats of each player as text with units ('185 cm', '7.5%')
+
+    Args:
+        path(str): json file to write
+        n_players(int): number of players, same names as kaggle_dataset with same seed for the first ones
+        seed(int): random seed
+
+    Returns:
+        full_names(list): names of players
+
+    '''
+
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    full_names, _ = player_names(n_players, seed)
+
+    df = pd.DataFrame({'name': full_names,
+                       'Age': rng.integers(18, 40, n_players).astype(str),
+                       'Country': rng.choice(COUNTRIES, n_players),
+                       'Height': pd.Series(rng.integers(165, 210, n_players)).astype(str) + ' cm',
+                       'Weight': pd.Series(rng.integers(60, 100, n_players)).astype(str) + ' kg',
+                       'Plays': rng.choice(['Right-handed', 'Left-handed'], n_players, p = [0.85, 0.15]),
+                       'Backhand': rng.choice(['Two-handed', 'One-handed'], n_players),
+                       'Turned Pro': rng.integers(1995, 2015, n_players).astype(str)})
+
+    for fields in STATS_SECTIONS.values():
+        for field in fields:
+            values = pd.Series(rng.uniform(0, 100, n_players).round(1)).astype(str)
+            df[field] = values + '%' if field.endswith('%') else values
+
+    df.loc[rng.random(n_players) < 0.02, 'Ace %'] = '' #some players without stats, as in real pages
+
+    df.to_json(path, orient = 'records')
+
+    return full_names
@@ -1,25 +1,245 @@
-main_player = 'Rafael Nadal'
+import os
+import sys
+import argparse
+from src.func.pipeline_functions import Pipeline, Stage, MissingInputsError
 
-print(f'Welcome to {main_player} Stats Genertor\n')
 
-while True:
+'''
+Command line of Tennis Stats pipeline. Each step is also importable and callable with parameters:
 
-    answer = input('What would you like to do?\n\
-                    Press 0 to update players stats by scraping\n\
-                    Press 1 to clean datasets\n\
-                    Press 2 to generate new report\n\
-                    Press other key to escape\n')
+    from src.clean import clean
+    from src.plot import plot
 
-    if answer == '0':
-        exec(open("./src/scrape.py").read())
+    clean_df, df_players, agg_df = clean('Federer R.', 2005, 2010)
+    plot('Roger Federer', agg_df, df_players)
+'''
 
-    elif answer == '1':
-        exec(open("./src/clean.py").read())
 
-        
-    elif answer == '2':
-        exec(open("./src/plot.py").read())
+def clean_datasets(args):
+    '''
+    Runs clean step. Cleaning libraries are only imported if it has to run
 
+    Args:
+        args(Namespace): parsed command line
+
+    Returns:
+        clean_df(DataFrame), df_players(DataFrame), agg_df(DataFrame): as returned by src.clean.clean
+
+    '''
+
+    from src.clean import clean
+
+    return clean(args.kaggle_player, args.first_year, args.last_year)
+
+
+def clean_stage(args, store = False):
+    '''
+    Stage of clean step with the files it reads and writes. Clean only runs if Kaggle dataset, scraped players, cleaning code or arguments changed.
+    Clean always writes the store of games partitioned by season, but it is only required (and built if missing) for plots of some seasons
+
+    Args:
+        args(Namespace): parsed command line
+        store(bool): store of games is an output to check
+
+    Returns:
+        stage(Stage)
+
+    '''
+
+    rankings = [path for path in ['data/scraped_dataset/ranking_history.npz'] if os.path.exists(path)] #optional, clean runs without it
+
+    return Stage('clean',
+                 inputs = ['data/kaggle_dataset/Data.csv', 'data/scraped_dataset/players_info.json'] + rankings,
+                 outputs = ['data/dataset_clean.parquet', 'data/players_stats_clean.parquet', 'data/dataset_aggregates.parquet']
+                           + (['data/matches'] if store else []), #registry of player ids is written along, only read if datasets hold ids
+                 code = ['src/clean.py', 'src/func/cleaning_functions.py', 'src/func/store_functions.py'],
+                 action = lambda: clean_datasets(args),
+                 params = {'player': args.kaggle_player, 'first_year': args.first_year, 'last_year': args.last_year},
+                 shipped_params = {'player': 'Nadal R.', 'first_year': None, 'last_year': None}) #clean datasets committed in data/
+
+
+def exit_if_failed(times):
+    '''
+    Exits with code 1 if some chart failed, so scripted runs can detect it
+
+    Args:
+        times(dict): as returned by src.plot.plot
+
+    Returns:
+
+    '''
+
+    if any(isinstance(result, str) for result in times.values()):
+        sys.exit(1)
+
+
+def run_scrape(args):
+
+    from src.scrape import scrape_players
+
+    options = {'n_workers': args.workers, 'first_year': args.first_year, 'end_year': args.last_year} #given before or after command
+    scrape_players(args.backend, max_requests_minute = args.max_requests, **{key: value for key, value in options.items() if value is not None})
+
+
+def run_clean(args):
+
+    Pipeline([clean_stage(args)]).run(['clean'], args.force)
+
+
+def last_clean_years(args):
+    '''
+    Same arguments with year range of last clean (all seasons if none): year range of plot selects seasons plotted, read from games kept
+    by last clean, so changing seasons does not clean again and a range given to clean is not undone by plot
+
+    Args:
+        args(Namespace): parsed command line
+
+    Returns:
+        args(Namespace)
+
+    '''
+
+    params = Pipeline().saved_params('clean') or {}
+
+    return argparse.Namespace(**dict(vars(args), first_year = params.get('first_year'), last_year = params.get('last_year')))
+
+
+def run_plot(args):
+
+    from src.plot import plot
+
+    seasons = args.first_year is not None or args.last_year is not None
+    stage = clean_stage(last_clean_years(args), store = seasons) #store of games only read by plots of some seasons
+    pipeline = Pipeline([stage])
+    pipeline.run(['clean'], args.force and not pipeline.missing_inputs(stage)) #only if inputs changed since last clean. Without raw data, --force only redraws charts
+    times = plot(args.player, n_workers = args.workers, force = args.force, first_year = args.first_year, last_year = args.last_year) #only charts whose inputs changed
+    exit_if_failed(times)
+
+
+def run_all(args):
+    '''
+    Cleans and plots in one go. If clean has to run, plots are drawn from the frames it returns instead of reading them back from disk
+    (except plots of some seasons, which read only those seasons)
+    '''
+
+    from src.plot import plot
+
+    seasons = {'first_year': args.first_year, 'last_year': args.last_year}
+    args = last_clean_years(args)
+    stage = clean_stage(args, store = any(year is not None for year in seasons.values()))
+    pipeline = Pipeline([stage])
+
+    missing = pipeline.missing_inputs(stage)
+    if (args.force and not missing) or not pipeline.is_up_to_date(stage): #without raw data, --force only redraws charts
+        if missing:
+            raise MissingInputsError(f'clean cannot run without {", ".join(missing)}')
+        clean_df, df_players, agg_df = clean_datasets(args)
+        pipeline.mark_done(stage)
+        times = plot(args.player, agg_df, df_players, n_workers = args.workers, force = args.force, **seasons)
     else:
-        print(f'Closing {main_player} Stats Generator')
-        exit()    
+        print('clean is up to date, skipped')
+        times = plot(args.player, n_workers = args.workers, force = args.force, **seasons)
+
+    exit_if_failed(times)
+
+
+def run_batch(args):
+
+    from src.batch import batch
+
+    batch(args.n_players, args.first_year, args.last_year, n_workers = args.workers)
+
+
+def run_ratings(args):
+
+    from src.ratings import ratings
+
+    ratings(rebuild = args.rebuild)
+
+
+def shared_options(suppress = False):
+    '''
+    Options accepted before and after the command. Copies used after the command have no defaults, so they do not overwrite values given before it
+
+    Args:
+        suppress(bool): copies for subcommands
+
+    Returns:
+        years(ArgumentParser): parent parser of season range
+        player(ArgumentParser): parent parser of player options, with season range
+
+    '''
+
+    default = (lambda value: argparse.SUPPRESS) if suppress else (lambda value: value)
+
+    years = argparse.ArgumentParser(add_help = False)
+    years.add_argument('--first-year', type = int, default = default(None), help = 'first season of games kept by clean and batch, or plotted by plot and --all')
+    years.add_argument('--last-year', type = int, default = default(None), help = 'last season of games kept by clean and batch, or plotted by plot and --all')
+
+    player = argparse.ArgumentParser(add_help = False, parents = [years])
+    player.add_argument('--player', default = default('Rafael Nadal'), help = 'player to study, name as in players stats')
+    player.add_argument('--kaggle-player', default = default('Nadal R.'), help = 'player to study, name as in Kaggle dataset')
+    player.add_argument('--force', action = 'store_true', default = default(False), help = 'run even if up to date')
+    player.add_argument('--workers', type = int, default = default(None), help = 'number of processes for plots, by default number of cores')
+
+    return years, player
+
+
+def parse_args(argv = None):
+    '''
+    Command line arguments
+
+    Args:
+        argv(list): arguments, sys.argv if None
+
+    Returns:
+        args(Namespace)
+
+    '''
+
+    _, player = shared_options()
+    command_years, command_player = shared_options(suppress = True)
+
+    parser = argparse.ArgumentParser(description = 'Tennis Stats Generator', parents = [player])
+    parser.add_argument('--all', action = 'store_true', help = 'clean datasets and generate report, without reading clean datasets back from disk')
+
+    commands = parser.add_subparsers(dest = 'command')
+
+    scrape = commands.add_parser('scrape', help = 'update players stats by scraping')
+    scrape.add_argument('--backend', choices = ['selenium', 'http'], default = 'selenium')
+    scrape.add_argument('--workers', type = int, default = argparse.SUPPRESS, help = 'browsers or http sessions at the same time, by default 4')
+    scrape.add_argument('--max-requests', type = int, default = 60, help = 'requests to website per minute among all workers, two per player')
+    scrape.add_argument('--first-year', type = int, default = argparse.SUPPRESS, help = 'first season of rankings scraped, by default 2000')
+    scrape.add_argument('--last-year', type = int, default = argparse.SUPPRESS, help = 'last season of rankings scraped, by default 2020')
+    scrape.set_defaults(func = run_scrape)
+
+    commands.add_parser('clean', parents = [command_player], help = 'clean datasets').set_defaults(func = run_clean)
+    commands.add_parser('plot', parents = [command_player], help = 'generate new report').set_defaults(func = run_plot)
+
+    batch = commands.add_parser('batch', parents = [command_years], help = 'generate reports of top players')
+    batch.add_argument('--n-players', type = int, default = 100, help = 'players with most games in Kaggle dataset')
+    batch.add_argument('--workers', type = int, default = argparse.SUPPRESS, help = 'number of processes, by default number of cores')
+    batch.set_defaults(func = run_batch)
+
+    ratings = commands.add_parser('ratings', help = 'update Elo and surface Elo of all players with new games')
+    ratings.add_argument('--rebuild', action = 'store_true', help = 'rate all games again')
+    ratings.set_defaults(func = run_ratings)
+
+    args = parser.parse_args(argv)
+
+    if args.all:
+        args.func = run_all
+    elif args.command is None:
+        parser.error('choose a command or --all')
+
+    return args
+
+
+if __name__ == '__main__': #workers of process pools import this file, they must not run it
+
+    args = parse_args()
+    print(f'Welcome to {args.player} Stats Generator\n')
+    try:
+        args.func(args)
+    except MissingInputsError as error:
+        sys.exit(f'Error: {error}')
@@ -0,0 +1,61 @@
+import src.func.cleaning_functions as cleaning
+from src.func.batch_functions import generate_reports
+
+
+def batch(n_players = 100, first_year = None, last_year = None,
+          kaggle_dataset_path = 'data/kaggle_dataset/Data.csv',
+          players_info_path = 'data/scraped_dataset/players_info.json',
+          name_cache_path = 'data/scraped_dataset/name_resolution.json',
+          output_root = 'output/players',
+          image_cache_dir = 'data/image_cache',
+          n_workers = None):
+    '''
+    Generates reports of players with most games, cleaning all games and players stats only once
+
+    Args:
+        n_players(int): players with most games in Kaggle dataset
+        first_year(int): first season of games kept, all seasons if None
+        last_year(int): last season of games kept, all seasons if None
+        kaggle_dataset_path(str): path csv file with games from Kaggle
+        players_info_path(str): path json file with players info
+        name_cache_path(str): Kaggle names already matched with scraped players
+        output_root(str): plots of each player saved in a subfolder
+        image_cache_dir(str): flags and pictures resized once for all workers
+        n_workers(int): number of processes, by default number of cores
+
+    Returns:
+        results(dict): Keys: name of player, Values: dict with seconds to create each plot or error message
+
+    '''
+
+    print('Starting to generate reports of top players')
+
+    years = None
+    if first_year is not None or last_year is not None:
+        years = (first_year or 0, last_year or 9999)
+
+
+    # Cleaning all games and players stats only once
+
+    clean_df, df_players, registry = cleaning.prepare_dataset(kaggle_dataset_path, players_info_path, None, name_cache_path, years)
+    agg_df = cleaning.build_aggregates(clean_df) #plots of every player read from here
+
+    players = clean_df.Player.value_counts().head(n_players).index.to_list()
+
+    #names of players as in players stats, for aces plot and pictures
+    names = list(registry.decode(players))
+
+
+    # Plots of all players, in parallel
+
+    results = generate_reports(agg_df, df_players, players, names, output_root, n_workers, image_cache_dir, registry)
+    results = {registry.names[player]: times for player, times in results.items()}
+
+    for player, times in results.items():
+        errors = {plot: result for plot, result in times.items() if isinstance(result, str)}
+        if errors:
+            print(f'{player}: {errors}')
+
+    print(f'Reports of {len(results)} players saved in {output_root}.\n')
+
+    return results
@@ -0,0 +1,107 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from src.func.render_functions import timed_render #sets Agg backend, workers only save files
+from src.func.plotting_functions import Plot
+
+
+'''
+Collection of functions used for generating reports of many players from one prepared dataset
+'''
+
+
+#Dataset shared by all reports of a worker, set once by init_worker
+shared = {}
+
+
+def player_index(df):
+    '''
+    Positions of rows of each player in aggregated dataset, built once so each report takes its rows without filtering whole dataset
+
+    Args:
+        df(DataFrame): aggregated dataset from cleaning.build_aggregates
+
+    Returns:
+        index(dict): Keys: player id (or Kaggle name), Values: array of row positions
+
+    '''
+
+    return df.groupby('Player', sort = False).indices
+
+
+def init_worker(df, df_players, index, image_cache_dir = None, registry = None):
+    '''
+    Stores dataset in worker process, once per worker instead of once per report
+
+    Args:
+        df(DataFrame): aggregated dataset from cleaning.build_aggregates
+        df_players(DataFrame): players stats clean
+        index(dict): from player_index
+        image_cache_dir(str): folder shared by workers for resized flags and pictures, optional
+        registry(PlayerRegistry): names of player ids, optional
+
+    Returns:
+
+    '''
+
+    Plot.image_cache.disk_dir = image_cache_dir
+    Plot.registry = registry
+
+    shared['df'] = df
+    shared['df_players'] = df_players
+    shared['index'] = index
+
+
+def generate_player_report(player, name, output_dir):
+    '''
+    Creates all plots of a player in output_dir. A plot failing (for instance, missing picture) does not stop the rest.
+
+    Args:
+        player(int): id of player
+        name(str): name of player in players stats
+        output_dir(str): folder to save plots
+
+    Returns:
+        times(dict): Keys: plot, Values: seconds to create it, or error message if it failed
+
+    '''
+
+    os.makedirs(output_dir, exist_ok = True)
+    df = shared['df'].iloc[shared['index'][player]]
+
+    plots = {'plot_surface_win': lambda: Plot.plot_surface_win(df, output_dir),
+             'plot_losses_detail': lambda: Plot.plot_losses_detail(df, output_dir),
+             'plot_top_countries_defeated': lambda: Plot.plot_top_countries_defeated(df, output_dir),
+             'plot_top_nemesis': lambda: Plot.plot_top_nemesis(df, output_dir),
+             'plot_box_aces': lambda: Plot.plot_box_aces(shared['df_players'], name, output_dir)}
+
+    return {plot_name: timed_render(plot) for plot_name, plot in plots.items()}
+
+
+def generate_reports(df, df_players, players, names, output_root = 'output/players', n_workers = None, image_cache_dir = None, registry = None):
+    '''
+    Creates plots of all players with a pool of processes, all of them reading the same prepared dataset
+
+    Args:
+        df(DataFrame): aggregated dataset from cleaning.build_aggregates
+        df_players(DataFrame): players stats clean
+        players(list): ids of players
+        names(list): names of players in players stats, same order as players
+        output_root(str): plots of each player are saved in a subfolder named after player
+        n_workers(int): number of processes, by default number of cores
+        image_cache_dir(str): folder shared by workers for resized flags and pictures, optional
+        registry(PlayerRegistry): names of player ids, optional
+
+    Returns:
+        results(dict): Keys: id of player, Values: result of generate_player_report
+
+    '''
+
+    index = player_index(df)
+    names = [name for player, name in zip(players, names) if player in index]
+    players = [player for player in players if player in index]
+    folders = [os.path.join(output_root, str(name).replace(' ', '_').replace('.', '')) for name in names]
+
+    with ProcessPoolExecutor(max_workers = n_workers, initializer = init_worker, initargs = (df, df_players, index, image_cache_dir, registry)) as pool:
+        results = pool.map(generate_player_report, players, names, folders)
+
+        return dict(zip(players, results))
@@ -1,6 +1,6 @@
 import pandas as pd
-import re
 import json
+import hashlib
 import numpy as np
 
 
@@ -9,6 +9,76 @@ Collection of functions used for cleaning datasets
 '''
 
 
+#Columns of Kaggle dataset kept, rest of columns are related to bets
+KAGGLE_COLUMNS = ['ATP', 'Location', 'Tournament', 'Date', 'Series', 'Court', 'Surface', 'Round', 'Best of',
+                  'Winner', 'Loser', 'WRank', 'LRank', 'W1', 'L1', 'W2', 'L2', 'W3', 'L3', 'W4', 'L4', 'W5', 'L5',
+                  'Wsets', 'Lsets', 'Comment']
+
+KAGGLE_DTYPES = {'ATP': 'int16', 'Best of': 'int8',
+                 'Location': str, 'Tournament': str, 'Date': str, 'Series': str, 'Court': str, 'Surface': str,
+                 'Round': str, 'Winner': str, 'Loser': str, 'Comment': str,
+                 'WRank': str, 'LRank': str, 'W1': str, 'L1': str, 'W2': str, 'L2': str, 'W3': str, 'L3': str,
+                 'W4': str, 'L4': str, 'W5': str, 'L5': str, 'Wsets': str, 'Lsets': str}
+
+#Read as text and converted to numbers, values like 'NR' turn to NaN instead of breaking the parser
+KAGGLE_NUMERIC = ['WRank', 'LRank', 'W1', 'L1', 'W2', 'L2', 'W3', 'L3', 'W4', 'L4', 'W5', 'L5', 'Wsets', 'Lsets']
+
+
+def read_kaggle_dataset(path, players=None, chunksize=100000, years=None):
+    '''
+    Reads Kaggle dataset by chunks with C parser, keeping only KAGGLE_COLUMNS and games of players.
+    Peak memory depends on chunksize and games kept, not on size of csv file.
+
+    Args:
+        path(str): path of csv file
+        players(list): players to keep games of, all games if None
+        chunksize(int): rows read at once
+        years(tuple): (first_year, last_year) of games to keep, both included, all years if None
+
+    Returns:
+        df(DataFrame): games, index is row number in csv file
+
+    '''
+
+    if players is not None:
+        players = list(players)
+
+    chunks = []
+    reader = pd.read_csv(path, engine='c', usecols=KAGGLE_COLUMNS, dtype=KAGGLE_DTYPES, chunksize=chunksize)
+
+    for chunk in reader:
+        if players is not None:
+            chunk = chunk.loc[chunk.Winner.isin(players) | chunk.Loser.isin(players)].copy()
+
+        if years is not None:
+            year = pd.to_datetime(chunk.Date, dayfirst=True, errors='coerce').dt.year
+            chunk = chunk.loc[year.between(years[0], years[1])].copy()
+
+        for column in KAGGLE_NUMERIC:
+            chunk[column] = pd.to_numeric(chunk[column], errors='coerce', downcast='float')
+
+        chunks.append(chunk[KAGGLE_COLUMNS])
+
+    if not chunks:
+        return pd.DataFrame(columns=KAGGLE_COLUMNS)
+
+    return pd.concat(chunks)
+
+
+#Numeric columns of scraped players and their dtype. Everything else stays as scraped
+PLAYER_STATS_SCHEMA = {'Height': 'float32', 'Weight': 'float32',
+                       'Ace %': 'float32', 'Double Fault %': 'float32', '1st Serve %': 'float32',
+                       '1st Serve Won %': 'float32', '2nd Serve Won %': 'float32', 'Break Points Saved %': 'float32',
+                       'Service Points Won %': 'float32', 'Service Games Won %': 'float32', 'Ace Against %': 'float32',
+                       'Double Fault Against %': 'float32', '1st Srv. Return Won %': 'float32',
+                       '2nd Srv. Return Won %': 'float32', 'Break Points Won %': 'float32', 'Return Points Won %': 'float32',
+                       'Return Games Won %': 'float32', 'Points Dominance': 'float32', 'Games Dominance': 'float32',
+                       'Break Points Ratio': 'float32', 'Total Points Won %': 'float32', 'Games Won %': 'float32',
+                       'Sets Won %': 'float32', 'Matches Won %': 'float32'}
+
+UNITS = r'%|cm|kg' #removed from values before converting to numbers
+
+
 def set_opponent(row, main_player):
     '''
     Determines the opponent of a specific main player from dataset
@@ -63,117 +133,692 @@ def filter_games(df, main_player):
     return df
 
 
-def match_id_players(df, df_1):
+def long_format(df):
+    '''
+    Turns every match into two rows, one from the perspective of each player, so datasets of all players come out of one pass.
+    Replaces row-wise set_opponent and is_winner by column operations.
+
+    Args:
+        df(DataFrame): the whole dataset, one row per match
+
+    Returns:
+        df_long(DataFrame): two rows per match with new columns match_id (index of match in df), Player, Opponent and Is_winner
+
+    '''
+
+    n_games = len(df)
+    rows = np.repeat(np.arange(n_games), 2) #each match twice, winner perspective first
+
+    winners = df.Winner.to_numpy()
+    losers = df.Loser.to_numpy()
+
+    player = np.empty(2 * n_games, dtype=winners.dtype) #names, or int32 ids from PlayerRegistry
+    player[0::2] = winners
+    player[1::2] = losers
+
+    opponent = np.empty(2 * n_games, dtype=winners.dtype)
+    opponent[0::2] = losers
+    opponent[1::2] = winners
+
+    df_long = df.iloc[rows].reset_index(drop=True)
+    df_long.insert(0, 'match_id', df.index.to_numpy()[rows])
+    df_long['Player'] = player
+    df_long['Opponent'] = opponent
+    df_long['Is_winner'] = np.tile([True, False], n_games)
+
+    return df_long
+
+
+def player_games(df_long, main_players):
+    '''
+    Selects from long format dataset the games of main players, seen from their side.
+    Same rows as filter_games plus set_opponent and is_winner, without any apply.
+
+    Args:
+        df_long(DataFrame): dataset from long_format
+        main_players(list): main players, as in Player column (ids once encoded)
+
+    Returns:
+        df(DataFrame): games of main players
+
+    '''
+
+    df = df_long.loc[df_long.Player.isin(main_players)].copy()
+
+    return df
+
+
+NO_MATCH = 'No match'
+
+#Players whose Kaggle name cannot be found by any rule, fixed by hand
+MANUAL_NAMES = {'Del Potro J.M.': 'Juan Martin Del Potro',
+                'Bautista R.': 'Roberto Bautista Agut'}
+
+#Version of PlayerNameIndex rules, part of the key of the name resolution cache: increase it when rules change so cached names are resolved again
+RESOLVER_VERSION = 1
+
+
+class PlayerNameIndex():
+    '''
+    Hash maps built once from scraped players names to resolve Kaggle names ('Surname I.') in O(1) per name
+    '''
+
+    def __init__(self, names):
+        '''
+        Args:
+            names(iterable): full names of scraped players ('Name Surname')
+        '''
+
+        names = [name for name in names if isinstance(name, str)]
+
+        #buckets of full names sharing a key, a rule only matches if its bucket has one name (or takes the first one)
+        self.surname_names = {} #surname (last word)
+        self.initial_names = {} #'Surname I.'
+        self.double_surname_names = {} #everything after first name (double surnames)
+        for name in names:
+            self.surname_names.setdefault(name.rsplit(' ',1)[-1], []).append(name)
+            if ' ' in name:
+                first, rest = name.split(' ',1)
+                self.initial_names.setdefault(rest + ' ' + first[0] + '.', []).append(name)
+            self.double_surname_names.setdefault(name.split(' ',1)[-1], []).append(name)
+
+        #unique surname -> full name
+        self.by_surname = {surname: bucket[0] for surname, bucket in self.surname_names.items() if len(bucket) == 1}
+
+        #unique 'Surname I.' -> full name
+        self.by_surname_initial = {key: bucket[0] for key, bucket in self.initial_names.items() if len(bucket) == 1}
+
+        #double surname -> first full name found
+        self.by_double_surname = {key: bucket[0] for key, bucket in self.double_surname_names.items()}
+
+        self.manual = dict(MANUAL_NAMES)
+
+    def fingerprint(self, name):
+        '''
+        Hash of everything resolve looks at for a Kaggle name: its manual fix and the buckets of scraped names of each rule.
+        A resolution is still valid while its fingerprint does not change, even if other scraped players were added.
+
+        Args:
+            name(str): player name in Kaggle dataset
+
+        Returns:
+            digest(str)
+
+        '''
+
+        candidates = [str(RESOLVER_VERSION),
+                      self.manual.get(name, ''),
+                      '|'.join(self.surname_names.get(name.split(' ',1)[0], [])),
+                      '|'.join(self.initial_names.get(name, [])),
+                      '|'.join(self.double_surname_names.get(name.replace('-',' ').rsplit(' ',1)[0], []))]
+
+        return hashlib.sha1('\n'.join(candidates).encode()).hexdigest()[:16]
+
+
+    def resolve(self, name):
+        '''
+        Finds the scraped player of a Kaggle name, trying rules in order: manual fix, unique surname, unique surname plus initial, double surname
+
+        Args:
+            name(str): player name in Kaggle dataset
+
+        Returns:
+            match_name(str): scraped name or 'No match'
+            strategy(str): rule which found the match, None if no match
+
+        '''
+
+        if name in self.manual:
+            return self.manual[name], 'manual'
+
+        surname = name.split(' ',1)[0]
+        if surname in self.by_surname:
+            return self.by_surname[surname], 'surname'
+
+        if name in self.by_surname_initial:
+            return self.by_surname_initial[name], 'surname_initial'
+
+        double_surname = name.replace('-',' ').rsplit(' ',1)[0]
+        if double_surname in self.by_double_surname:
+            return self.by_double_surname[double_surname], 'double_surname'
+
+        return NO_MATCH, None
+
+
+def coerce_player_stats(df_1, schema=PLAYER_STATS_SCHEMA):
+    '''
+    Converts columns of scraped players declared in schema from strings like '5.2%' or '185 cm' to numbers, whole columns at once.
+    Reports how many values could not be parsed, these become NaN.
+
+    Args:
+        df_1(Dataframe): Players stats from scraping, changed in place
+        schema(dict): Keys: column, Values: dtype
+
+    Returns:
+        df_1(Dataframe): Players stats with numeric columns
+        failed(dict): Keys: column, Values: number of values which could not be parsed
+
+    '''
+
+    failed = {}
+
+    for column, dtype in schema.items():
+        if column not in df_1.columns:
+            continue
+
+        text = df_1[column].astype('string').str.replace(UNITS, '', regex=True).str.strip()
+        text = text.mask(text == '')
+        values = pd.to_numeric(text, errors='coerce')
+
+        failed[column] = int((values.isna() & text.notna()).sum())
+        df_1[column] = values.to_numpy(dtype=dtype, na_value=np.nan)
+
+    for column, count in failed.items():
+        if count > 0:
+            print(f'{count} values of {column} could not be parsed')
+
+    return df_1, failed
+
+
+#Columns with few distinct values, stored as categories
+CATEGORICAL_COLUMNS = ['Surface', 'Court', 'Round', 'Series', 'Tournament', 'Location', 'Country', 'Plays', 'Backhand']
+
+
+def as_categories(df):
+    '''
+    Columns of CATEGORICAL_COLUMNS as categories: one small integer code per row instead of a repeated string
+
+    Args:
+        df(DataFrame): changed in place
+
+    Returns:
+        df(DataFrame)
+
+    '''
+
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+
+    return df
+
+
+def save_dataset(df, path):
+    '''
+    Saves a clean dataset as Parquet file, with columns of CATEGORICAL_COLUMNS as categories
+
+    Args:
+        df(DataFrame): clean dataset
+        path(str): path of parquet file
+
+    Returns:
+
+    '''
+
+    as_categories(df.copy()).to_parquet(path, index=False)
+
+
+def players_hash(df_1, players_info_path=None):
+    '''
+    Content hash of scraped players, manual names and resolver version, key of the name resolution cache: while it does not change, no saved resolution is checked again
+
+    Args:
+        df_1(Dataframe): Players stats from scraping
+        players_info_path(str): path of players_info.json, its content is part of the hash if given
+
+    Returns:
+        key(str): hex digest
+
+    '''
+
+    sha = hashlib.sha1()
+
+    if players_info_path is not None:
+        with open(players_info_path, 'rb') as fp:
+            for block in iter(lambda: fp.read(1 << 20), b''):
+                sha.update(block)
+
+    sha.update('\n'.join(sorted(df_1.name.dropna().astype(str))).encode())
+    sha.update(json.dumps([RESOLVER_VERSION, MANUAL_NAMES], sort_keys=True).encode())
+
+    return sha.hexdigest()
+
+
+def load_name_cache(cache_path):
+    '''
+    Reads the name resolution table saved by a previous run
+
+    Args:
+        cache_path(str): path of json file with resolution table
+
+    Returns:
+        key(str): players hash when table was saved, None if there is no table
+        names(dict): Keys: Kaggle name, Values: [scraped name, strategy, fingerprint]
+
+    '''
+
+    try:
+        with open(cache_path, 'r') as fp:
+            cache = json.load(fp)
+    except (OSError, ValueError): #first time it does not exist
+        return None, {}
+
+    return cache.get('key'), cache.get('names', {})
+
+
+def save_name_cache(cache_path, key, names):
+    '''
+    Saves the name resolution table as json
+
+    Args:
+        cache_path(str): path of json file with resolution table
+        key(str): current players hash
+        names(dict): Keys: Kaggle name, Values: [scraped name, strategy, fingerprint]
+
+    Returns:
+
+    '''
+
+    with open(cache_path, 'w') as fp:
+        json.dump({'key': key, 'names': names}, fp)
+
+
+def resolve_names(names, df_1, cache_path=None, players_info_path=None):
+    '''
+    Finds the scraped player of each Kaggle name with a PlayerNameIndex.
+    If cache_path is given, resolutions are kept on disk. If scraped players did not change, only names not seen before are resolved.
+    Otherwise (a scrape top-up) names whose candidate scraped players changed (PlayerNameIndex.fingerprint) are resolved again too, the rest are kept.
+
+    Args:
+        names(iterable): unique Kaggle names
+        df_1(Dataframe): Players stats from scraping
+        cache_path(str): path of json file with resolution table, optional
+        players_info_path(str): path of players_info.json to key the cache on, optional
+
+    Returns:
+        resolved(dict): Keys: Kaggle name, Values: scraped name or 'No match'
+
+    '''
+
+    index = None
+    if cache_path is not None:
+        key = players_hash(df_1, players_info_path)
+        saved_key, resolved = load_name_cache(cache_path)
+        if saved_key != key: #scraped players changed, keep resolutions whose candidates did not
+            index = PlayerNameIndex(df_1.name)
+            resolved = {name: match for name, match in resolved.items() if match[2:] == [index.fingerprint(name)]}
+    else:
+        resolved = {}
+
+    new_names = [name for name in names if name not in resolved]
+
+    if new_names:
+        index = index or PlayerNameIndex(df_1.name)
+        for name in new_names:
+            resolved[name] = list(index.resolve(name)) + [index.fingerprint(name)]
+
+    if cache_path is not None and (new_names or saved_key != key):
+        save_name_cache(cache_path, key, resolved)
+        print(f'{len(new_names)} new or changed names resolved. Name resolution table saved in {cache_path}')
+
+    return {name: match[0] for name, match in resolved.items()}
+
+
+def match_id_players(df, df_1, cache_path=None, players_info_path=None):
     '''
-    Given the two different dataframes, find matches between players names (which are in different format) for later insertion of player stats to dataset
+    Given the two different dataframes, find matches between players names (which are in different format) for later insertion of player stats to dataset.
+    Each unique opponent name is resolved once and then mapped back to all rows.
 
     Args:
         df(Dataframe): Dataset from Kaggle
         df_1(Dataframe): Players stats from scraping
+        cache_path(str): path of json file with resolution table, optional
+        players_info_path(str): path of players_info.json to key the cache on, optional
 
     Returns:
-        df['player_id]: new column with player_id unified between two dataframes
+        player_id(Series): new column with player_id unified between two dataframes
+
+    '''
 
+    resolved = resolve_names(df.Opponent.dropna().unique(), df_1, cache_path, players_info_path)
+
+    player_id = df.Opponent.map(resolved).fillna(NO_MATCH).rename('player_id')
+
+    return player_id
+
+
+class PlayerRegistry():
+    '''
+    Canonical players with dense int32 ids, so games keep one integer per player instead of a name, and joins and groupbys run on integers.
+    Scraped players come first, then Kaggle names without a scraped player. Kaggle names of scraped players are aliases of their id.
+    Names are only needed again to show them (Plot).
     '''
-    #First let's finde match by surname if surname is unique among players
 
-    surname_dict_count = df_1.name.apply(lambda x: x.rsplit(' ',1)[-1]).value_counts().to_dict() #dict with value_counts as key to see if are unique or not
+    def __init__(self, names=()):
+        '''
+        Args:
+            names(iterable): canonical names, scraped ones, getting ids 0, 1, 2...
+        '''
+
+        self.names = []
+        self.ids = {}
+        self.add(names)
+
+    def add(self, names):
+        '''
+        New canonical names get next ids, names already known keep theirs
+
+        Args:
+            names(iterable): player names, missing values skipped
+
+        Returns:
+
+        '''
+
+        for name in names:
+            if isinstance(name, str) and name not in self.ids:
+                self.ids[name] = len(self.names)
+                self.names.append(name)
 
-    def match_single_surname(name, surname_dict_count):
+    def add_aliases(self, aliases):
         '''
-        Function to use in pandas apply to find matches by unique surname.
+        Other names of known players, as Kaggle names. An alias without a known player becomes a player itself
+
         Args:
-            name(str): full name player in Kaggle dataset
-            surname_dict_count(dict): Keys: surname, Values: number of appearance of that surname among players
-        
+            aliases(dict): Keys: alias, Values: canonical name or 'No match'
+
         Returns:
-            match_name(str): match_id or 'No match'
 
+        '''
+
+        for alias, name in aliases.items():
+            if alias in self.ids:
+                continue
+            if name in self.ids:
+                self.ids[alias] = self.ids[name]
+            else:
+                self.add([alias])
 
+    def encode(self, names):
         '''
+        Ids of names, each distinct name looked up once
+
+        Args:
+            names(iterable): player names or aliases
+
+        Returns:
+            ids(ndarray): int32, -1 for unknown or missing names
 
-        name = name.split(' ',1)[0] #which is the surname
+        '''
 
-        cond = (name in surname_dict_count) and (surname_dict_count.get(name) == 1)   
+        codes, uniques = pd.factorize(np.asarray(names, dtype=object))
+        ids = np.array([self.ids.get(name, -1) for name in uniques] + [-1], dtype=np.int32) #last one for missing names, code -1
 
-        if cond:
-            match_name = df_1[df_1["name"].str.find(name) > 0].name.to_list()[0]
-            return match_name
-        else:
-            return 'No match'
-        
-    df['player_id'] = df.Opponent.apply(lambda x: match_single_surname(x, surname_dict_count))
+        return ids[codes]
 
-    #Now let's find matches by converting full name in Surname I. 
-    name_surname_dict = df_1.name.apply(lambda x: x.split(' ',1)[1]+' '+x.split(' ',1)[0][0]+'.').value_counts().to_dict() #dict with value counts to see if surname + X. are unique or not
-        
-    def match_name_surname(row, name_surname_dict):
+    def decode(self, ids):
         '''
-        Function to use in pandas apply to find matches by unique surname + initial
+        Canonical names of ids
+
         Args:
-            row(dataframe): row dataframe from apply function
-            name_surname_dict(dict): Keys: 'surname X.' Values: number of appearance of that surname plus initial among players
+            ids(iterable): int ids
 
         Returns:
-            match_name(str): match_id or 'No match'
+            names(ndarray): object, None for -1
 
         '''
 
+        names = np.array(self.names + [None], dtype=object)
+
+        return names[np.asarray(ids, dtype=np.int64)]
+
+    def table(self):
+        '''
+        Registry as a table, to save it
 
+        Args:
 
-        name = row['Opponent']
-        if (name in name_surname_dict) and (name_surname_dict.get(name) == 1):
-            
-            surname = name.split(' ',1)[0]
-            initial = name.split(' ',1)[1].rsplit('.',1)[0]
-            
-            for player in df_1['name'].to_list():
-                cond =  len(re.findall(r'\b' + re.escape(initial)+'.*'+re.escape(surname), player)) > 0
-                
-                if cond:
-                    
-                    return player
-                else:
-                    pass
+        Returns:
+            df(DataFrame): one row per name or alias with columns player_id, name and canonical
 
-        else:
-            return 'No match'
+        '''
 
-    df['player_id'] = df.apply(lambda x: match_name_surname(x, name_surname_dict) if x.player_id == 'No match' else x.player_id, axis = 1)
+        df = pd.DataFrame({'name': list(self.ids), 'player_id': np.fromiter(self.ids.values(), dtype=np.int32, count=len(self.ids))})
+        df['canonical'] = df.name.to_numpy(dtype=object) == self.decode(df.player_id)
 
-    #Last let's find out extra matches by replacing '-' in double surnames
-    surname_comb_list = df_1.name.apply(lambda x: x.split(' ',1)[-1]).to_list() #This time no dict since chances of having two same surnames is quite low
+        return df
 
-    def match_surname_union(row, surname_comb_list):
+    @classmethod
+    def from_table(cls, df):
         '''
-        Function to use in pandas apply to find matches in double surnames
+        Registry saved with table
+
         Args:
-            row(dataframe): row dataframe from apply function
-            surname_comb_list(list): list of first two words in player stats dataframe
-        
+            df(DataFrame): from table
+
         Returns:
-            match_name(str): match_id or 'No match'
+            registry(PlayerRegistry)
 
         '''
-        name = row['Opponent']
-        name = name.replace('-',' ')
-        surname = name.rsplit(' ',1)[0] #I keep as surname first two words '
-        
-        if surname in surname_comb_list:
-            match_name = df_1[df_1["name"].str.find(surname) > 0].name.to_list()[0]
-            
-            return match_name
-        
-        else:
-            return 'No match'
 
-    df['player_id'] = df.apply(lambda x: match_surname_union(x, surname_comb_list) if x.player_id == 'No match' else x.player_id, axis = 1)
+        registry = cls(df.loc[df.canonical].sort_values('player_id').name)
+        registry.ids.update(zip(df.name, df.player_id.astype(int)))
+
+        return registry
+
+
+def clean_players_info(df_1):
+    '''
+    Cleans players stats from scraping: numeric columns and great_serve column (Ace % above percentile 85)
+
+    Args:
+        df_1(Dataframe): Players stats from scraping
+
+    Returns:
+        df_1(Dataframe): Players stats clean
+
+    '''
+
+    df_1, failed = coerce_player_stats(df_1) #numeric columns as declared in PLAYER_STATS_SCHEMA
+
+    #find ace% threshold of players categorized as good serve
+    ace_threshold = df_1['Ace %'].quantile(0.85)
+
+    df_1['great_serve'] = (df_1['Ace %'] > ace_threshold).where(df_1['Ace %'].notna()) #NaN if no ace% info
+
+    return df_1
+
+
+def merge_datasets(df, df_1):
+    '''
+    Adds stats of opponent to each game, joining on integer player ids
+
+    Args:
+        df(Dataframe): games in long format, Opponent as ids of PlayerRegistry
+        df_1(Dataframe): Players stats clean, with player_id column
+
+    Returns:
+        clean_df(Dataframe): games with opponent stats
+        df_players_merge(Dataframe): stats of all players kept
+
+    '''
+
+    df_games_merge = df.drop(['Winner', 'Loser', 'W1', 'L1', 'W2', 'L2', 'W3', 'L3', 'W4', 'L4', 'W5', 'L5','Comment'], axis = 1) #drop columns not to be used
+
+    df_players_merge = as_categories(df_1[['player_id', 'name','Country','Plays', 'Backhand', 'great_serve', 'Ace %' ]].copy()) #columns to keep
+
+    stats = df_players_merge.drop(columns = 'name').drop_duplicates('player_id').set_index('player_id')
+
+    clean_df = as_categories(df_games_merge.join(stats, on = 'Opponent')) #Opponent without scraped player gets no stats
+
+    return clean_df, df_players_merge
+
+
+def prepare_dataset(kaggle_path, players_info_path, players=None, cache_path=None, years=None, ranking_path=None):
+    '''
+    Whole cleaning in one pass: reads Kaggle games and scraped players, and merges them.
+    Each game appears once per player in players (or twice if players is None, once for winner and once for loser), in Player column.
+    Player and Opponent are int32 ids of the returned PlayerRegistry, text columns with few values are categories.
+
+    Args:
+        kaggle_path(str): path of Kaggle csv file
+        players_info_path(str): path of json file with players info
+        players(list): Kaggle names of players to keep games of, all players if None
+        cache_path(str): path of name resolution table, optional
+        years(tuple): (first_year, last_year) of games to keep, all years if None
+        ranking_path(str): path of rankings of seasons from scraping, to add rank columns (join_rankings), optional
+
+    Returns:
+        clean_df(Dataframe): games with opponent stats
+        df_players_merge(Dataframe): stats of all players
+        registry(PlayerRegistry): names of ids
+
+    '''
+
+    df = read_kaggle_dataset(kaggle_path, players, years=years) #streams csv, without bets columns
+
+    df_1 = clean_players_info(pd.read_json(players_info_path))
+
+    #each Kaggle name resolved once, then games only carry ids
+    registry = PlayerRegistry(df_1.name)
+    kaggle_names = pd.unique(np.concatenate([df.Winner.dropna().to_numpy(dtype=object), df.Loser.dropna().to_numpy(dtype=object)]))
+    registry.add_aliases(resolve_names(kaggle_names, df_1, cache_path, players_info_path))
+    df['Winner'] = registry.encode(df.Winner)
+    df['Loser'] = registry.encode(df.Loser)
+    df_1['player_id'] = registry.encode(df_1.name)
+
+    df = long_format(df) #two rows per match, one per player, with Opponent and Is_winner columns
+
+    if players is not None:
+        df = player_games(df, registry.encode(players)) #keep only games seen from side of players
+
+    clean_df, df_players_merge = merge_datasets(df, df_1)
+
+    history = load_ranking_history(ranking_path) if ranking_path is not None else None
+    if history is not None:
+        clean_df = join_rankings(clean_df, history, registry)
+
+    return clean_df, df_players_merge, registry
+
+
+def load_ranking_history(path):
+    '''
+    Reads rankings of seasons saved by scraping (scraping_functions.RankingHistory)
+
+    Args:
+        path(str): path of .npz file
+
+    Returns:
+        history(DataFrame): one row per season and player with columns season, name, rank and points. None if file does not exist
+
+    '''
+
+    try:
+        arrays = np.load(path)
+    except (OSError, ValueError): #rankings not scraped yet
+        return None
+
+    with arrays:
+        names = pd.Series(arrays['names'], index=arrays['ids'], dtype=object)
+
+        return pd.DataFrame({'season': arrays['season'], 'name': names.reindex(arrays['player_id']).to_numpy(),
+                             'rank': arrays['rank'], 'points': arrays['points']})
+
 
-    #Finally let's fix these two last players by hand
-    df['player_id'] = np.where(df['Opponent'] == 'Del Potro J.M.', 'Juan Martin Del Potro', df['player_id'])
-    df['player_id'] = np.where(df['Opponent'] == 'Bautista R.', 'Roberto Bautista Agut', df['player_id'])
+def join_rankings(df, history, registry):
+    '''
+    Adds rank of both players at time of each game, without requests: year-end rank of season before the game (last ranking published before it)
+    and best year-end rank up to that season. Ranks are looked up in a players x seasons array built once.
+
+    Args:
+        df(DataFrame): games with Player and Opponent as ids of registry, and Date
+        history(DataFrame): from load_ranking_history
+        registry(PlayerRegistry): ids of names of history
+
+    Returns:
+        df(DataFrame): copy with new columns Rank, Peak_rank, Opponent_rank and Opponent_peak_rank, NaN if player was not ranked
+
+    '''
+
+    players = registry.encode(history.name)
+    known = players >= 0 #players in rankings but not in scraped players stats are left out
+    seasons = history.season.to_numpy(dtype=np.int64)[known]
+    first_season = seasons.min() if len(seasons) else 0
+    n_seasons = seasons.max() - first_season + 1 if len(seasons) else 0
+
+    rank = np.full((len(registry.names), max(n_seasons, 0)), np.inf, dtype=np.float32)
+    np.minimum.at(rank, (players[known], seasons - first_season), history['rank'].to_numpy(dtype=np.float32)[known])
+    peak = np.minimum.accumulate(rank, axis=1)
+    rank[np.isinf(rank)] = np.nan
+    peak[np.isinf(peak)] = np.nan
+
+    dates = df.Date if pd.api.types.is_datetime64_any_dtype(df.Date) else pd.to_datetime(df.Date, dayfirst=True, errors='coerce')
+    season = dates.dt.year.to_numpy(dtype=np.float64) - 1 - first_season #ranking at end of previous season
+    in_history = (season >= 0) & (season < n_seasons)
+    season = np.where(in_history, season, 0).astype(np.int64)
+
+    df = df.copy()
+    for column, rank_column, peak_column in [('Player', 'Rank', 'Peak_rank'), ('Opponent', 'Opponent_rank', 'Opponent_peak_rank')]:
+        ids = df[column].to_numpy(dtype=np.int64)
+        found = in_history & (ids >= 0)
+        for new_column, table in [(rank_column, rank), (peak_column, peak)]:
+            values = np.full(len(df), np.nan, dtype=np.float32)
+            values[found] = table[ids[found], season[found]]
+            df[new_column] = values
+
+    return df
+
+
+def save_registry(registry, path):
+    '''
+    Saves a PlayerRegistry as Parquet file
+
+    Args:
+        registry(PlayerRegistry)
+        path(str): path of parquet file
+
+    Returns:
+
+    '''
+
+    registry.table().to_parquet(path, index=False)
 
 
-    return df['player_id']
+def load_registry(path):
+    '''
+    Reads a PlayerRegistry saved with save_registry
+
+    Args:
+        path(str): path of parquet file
+
+    Returns:
+        registry(PlayerRegistry)
+
+    '''
+
+    return PlayerRegistry.from_table(pd.read_parquet(path))
+
+
+#Keys of aggregated dataset. Plays and great_serve depend on opponent, so they do not add groups
+AGGREGATE_KEYS = ['Player', 'Opponent', 'Surface', 'Country', 'Plays', 'great_serve']
+
+
+def build_aggregates(clean_df):
+    '''
+    Wins and total games of each player against each opponent on each surface, the only thing plots need.
+    Plots read this small table instead of all games.
+
+    Args:
+        clean_df(Dataframe): games with opponent stats, from prepare_dataset
+
+    Returns:
+        agg_df(Dataframe): one row per group in AGGREGATE_KEYS with columns wins and total
+
+    '''
+
+    agg_df = clean_df.groupby(AGGREGATE_KEYS, dropna=False, observed=True, sort=False).agg(wins=('Is_winner', 'sum'), total=('Is_winner', 'size')).reset_index()
 
+    agg_df['wins'] = agg_df['wins'].astype('int32')
+    agg_df['total'] = agg_df['total'].astype('int32')
 
+    return agg_df
@@ -0,0 +1,131 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from PIL import Image
+
+
+'''
+Cache of images used in plots (flags and players pictures), decoded and resized once
+'''
+
+
+class ImageCache():
+    '''
+    In-process LRU cache of images as arrays, already downscaled to display size.
+    Evicts least recently used images when total size goes above max_bytes.
+    With disk_dir, resized arrays are also saved as .npy files so other processes and later runs skip decoding png/jpeg.
+    '''
+
+    def __init__(self, max_bytes = 64 * 2**20, disk_dir = None):
+        '''
+        Args:
+            max_bytes(int): max memory used by cached arrays, by default 64 MB
+            disk_dir(str): folder for resized arrays, no disk cache if None
+        '''
+
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.images = OrderedDict()
+        self.nbytes = 0
+        self.lock = threading.Lock()
+
+    def key(self, path, max_size):
+        '''
+        Key of an image, changes if file is modified
+
+        Args:
+            path(str): path of image file
+            max_size(tuple): (width, height) in pixels, None for original size
+
+        Returns:
+            key(str)
+
+        '''
+
+        stat = os.stat(path)
+        return f'{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{max_size}'
+
+    def load(self, path, max_size):
+        '''
+        Decodes an image and downscales it to fit in max_size keeping aspect ratio
+
+        Args:
+            path(str): path of image file
+            max_size(tuple): (width, height) in pixels, None for original size
+
+        Returns:
+            image(ndarray): uint8 array, as plt.imread of a jpeg
+
+        '''
+
+        with Image.open(path) as image:
+            if image.mode not in ('RGB', 'RGBA', 'L'):
+                image = image.convert('RGBA')
+            if max_size is not None:
+                image.thumbnail(max_size, Image.LANCZOS) #only shrinks
+            return np.asarray(image)
+
+    def get(self, path, max_size = None):
+        '''
+        Image as array from memory, disk cache or file, in that order
+
+        Args:
+            path(str): path of image file
+            max_size(tuple): (width, height) in pixels, None for original size
+
+        Returns:
+            image(ndarray)
+
+        '''
+
+        key = self.key(path, max_size)
+
+        with self.lock:
+            if key in self.images:
+                self.images.move_to_end(key)
+                return self.images[key]
+
+        image = None
+        if self.disk_dir is not None:
+            disk_path = os.path.join(self.disk_dir, hashlib.sha1(key.encode()).hexdigest() + '.npy')
+            try:
+                image = np.load(disk_path)
+            except (OSError, ValueError):
+                image = None
+
+        if image is None:
+            image = self.load(path, max_size)
+            if self.disk_dir is not None:
+                os.makedirs(self.disk_dir, exist_ok = True)
+                temp_path = f'{disk_path}.{os.getpid()}.tmp.npy'
+                np.save(temp_path, image)
+                os.replace(temp_path, disk_path) #other processes never read a half written file
+
+        image.setflags(write = False) #shared between plots
+        self.put(key, image)
+
+        return image
+
+    def put(self, key, image):
+        '''
+        Adds an image to memory cache, evicting least recently used ones if needed
+
+        Args:
+            key(str): from key()
+            image(ndarray)
+
+        Returns:
+
+        '''
+
+        with self.lock:
+            if key in self.images:
+                return
+            self.images[key] = image
+            self.nbytes += image.nbytes
+
+            while self.nbytes > self.max_bytes and len(self.images) > 1:
+                _, old = self.images.popitem(last = False)
+                self.nbytes -= old.nbytes
@@ -0,0 +1,240 @@
+import os
+import json
+import hashlib
+
+
+'''
+Collection of functions used for rebuilding only what changed, Make-style: a stage runs again only if content of its inputs or code changed
+'''
+
+
+def file_hash(path):
+    '''
+    Content hash of a file
+
+    Args:
+        path(str): path of file
+
+    Returns:
+        digest(str): sha1 hex digest, 'missing' if file does not exist
+
+    '''
+
+    sha = hashlib.sha1()
+    try:
+        with open(path, 'rb') as fp:
+            for block in iter(lambda: fp.read(1 << 20), b''):
+                sha.update(block)
+    except FileNotFoundError:
+        return 'missing'
+
+    return sha.hexdigest()
+
+
+class MissingInputsError(Exception):
+    '''
+    Inputs of a stage are missing and its outputs were not built with the params asked, so they can be neither reused nor rebuilt
+    '''
+
+
+class Stage():
+    '''
+    Step of pipeline with declared files: it reads inputs, is defined by code and writes outputs
+    '''
+
+    def __init__(self, name, inputs, outputs, code, action = None, params = None, shipped_params = None):
+        '''
+        Args:
+            name(str): unique name of stage
+            inputs(list): paths of files read
+            outputs(list): paths of files written
+            code(list): paths of source files defining the stage
+            action(callable): runs the stage, optional if stage is run by caller
+            params(dict): arguments of action changing its outputs (player, years...), json serializable
+            shipped_params(dict): params of outputs committed with the repo, for when no run was saved yet, optional
+        '''
+
+        self.name = name
+        self.inputs = inputs
+        self.outputs = outputs
+        self.code = code
+        self.action = action
+        self.params = params if params is not None else {}
+        self.shipped_params = shipped_params
+
+
+class Pipeline():
+    '''
+    Stages in dependency order, with hashes of last successful run of each stage saved in a json file
+    '''
+
+    def __init__(self, stages = None, state_path = 'data/.pipeline_state.json'):
+        '''
+        Args:
+            stages(list): Stage objects, a stage must come after stages writing its inputs
+            state_path(str): path of json file with hashes of last runs
+        '''
+
+        self.stages = stages if stages is not None else []
+        self.state_path = state_path
+
+        self.state = self.load_state()
+
+    def load_state(self):
+        '''
+        Reads hashes of last runs
+
+        Args:
+
+        Returns:
+            state(dict): Keys: stage name, Values: dict with fingerprint and params of last run
+
+        '''
+
+        try:
+            with open(self.state_path, 'r') as fp:
+                return json.load(fp)
+        except (OSError, ValueError): #first time it does not exist
+            return {}
+
+    def fingerprint(self, stage):
+        '''
+        Hash of content of inputs and code of a stage, and of its params
+
+        Args:
+            stage(Stage)
+
+        Returns:
+            digest(str)
+
+        '''
+
+        sha = hashlib.sha1()
+        for path in sorted(stage.inputs) + sorted(stage.code):
+            sha.update(f'{path}:{file_hash(path)}\n'.encode())
+        sha.update(json.dumps(stage.params, sort_keys = True).encode())
+
+        return sha.hexdigest()
+
+    def saved_params(self, name):
+        '''
+        Params of last successful run of a stage
+
+        Args:
+            name(str): name of stage
+
+        Returns:
+            params(dict): None if no run was saved
+
+        '''
+
+        saved = self.state.get(name)
+
+        return saved.get('params') if isinstance(saved, dict) else None
+
+    def missing_inputs(self, stage):
+        '''
+        Inputs of a stage which do not exist
+
+        Args:
+            stage(Stage)
+
+        Returns:
+            paths(list)
+
+        '''
+
+        return [path for path in stage.inputs if not os.path.exists(path)]
+
+    def is_up_to_date(self, stage):
+        '''
+        A stage is up to date if all outputs exist and inputs, code and params did not change since its last run.
+        If some input is missing but outputs exist, outputs are kept as they are (nothing to rebuild them from), as long as they were
+        built with the same params (params of last run, or shipped_params of stage if there is none).
+
+        Args:
+            stage(Stage)
+
+        Returns:
+            boolean: MissingInputsError is raised instead if inputs are missing and outputs were built with other params
+
+        '''
+
+        if not all(os.path.exists(path) for path in stage.outputs):
+            return False
+
+        missing = self.missing_inputs(stage)
+        if missing:
+            params = self.saved_params(stage.name)
+            params = params if params is not None else stage.shipped_params
+            if params != stage.params:
+                raise MissingInputsError(f'{stage.name} cannot run without {", ".join(missing)}, and its outputs were built with {params}, not {stage.params}')
+            return True
+
+        saved = self.state.get(stage.name)
+        fingerprint = saved.get('fingerprint') if isinstance(saved, dict) else saved #state saved before params were kept
+
+        return fingerprint == self.fingerprint(stage)
+
+    def outdated(self, stages):
+        '''
+        Stages among given ones which need to run
+
+        Args:
+            stages(list): Stage objects
+
+        Returns:
+            stages(list): Stage objects not up to date
+
+        '''
+
+        return [stage for stage in stages if not self.is_up_to_date(stage)]
+
+    def mark_done(self, stage):
+        '''
+        Saves hash of a stage after a successful run
+
+        Args:
+            stage(Stage)
+
+        Returns:
+
+        '''
+
+        self.state = self.load_state() #other pipelines (as the one in plot.py) may have saved their stages meanwhile
+        self.state[stage.name] = {'fingerprint': self.fingerprint(stage), 'params': stage.params}
+
+        with open(self.state_path, 'w') as fp:
+            json.dump(self.state, fp, indent = 4)
+
+    def run(self, names = None, force = False):
+        '''
+        Runs stages in order, skipping those up to date. Downstream stages see new outputs of upstream ones as changed inputs.
+
+        Args:
+            names(list): names of stages to consider, all if None
+            force(bool): run even if up to date
+
+        Returns:
+            ran(list): names of stages which ran
+
+        '''
+
+        ran = []
+        for stage in self.stages:
+            if names is not None and stage.name not in names:
+                continue
+
+            if not force and self.is_up_to_date(stage):
+                print(f'{stage.name} is up to date, skipped')
+                continue
+
+            missing = self.missing_inputs(stage)
+            if missing:
+                raise MissingInputsError(f'{stage.name} cannot run without {", ".join(missing)}')
+
+            stage.action()
+            self.mark_done(stage)
+            ran.append(stage.name)
+
+        return ran
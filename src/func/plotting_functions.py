@@ -1,14 +1,14 @@
 import pandas as pd
 import numpy as np
-import seaborn as sns
 import matplotlib.pyplot as plt
 from iso3166 import countries
-import matplotlib.image as mpimg
 from matplotlib.transforms import TransformedBbox
 from matplotlib.transforms import Bbox
 from matplotlib.image import BboxImage
 from matplotlib.legend_handler import HandlerBase
 import matplotlib.patches as patches
+from src.func.image_cache import ImageCache
+from src.func.cleaning_functions import load_registry
 
 
 
@@ -17,25 +17,98 @@ class Plot():
     '''
     Collection of functions used for cleaning datasets
     '''
+
+    #Columns each plot needs, the only ones loaded from disk.
+    #All plots but plot_box_aces read aggregated dataset from cleaning.build_aggregates, plot_box_aces reads players stats
+    COLUMNS = {'plot_surface_win': ['Surface', 'wins', 'total'],
+               'plot_losses_detail': ['Surface', 'Plays', 'great_serve', 'wins', 'total'],
+               'plot_top_countries_defeated': ['Country', 'wins'],
+               'plot_top_nemesis': ['Opponent', 'wins', 'total'],
+               'plot_box_aces': ['name', 'Ace %']}
+
+    #File each plot is saved to, inside output_dir
+    FILENAMES = {'plot_surface_win': 'wins_surface.png',
+                 'plot_losses_detail': 'losses_details.png',
+                 'plot_top_countries_defeated': 'top_countries_defeated.png',
+                 'plot_top_nemesis': 'top_nemesis.png',
+                 'plot_box_aces': 'aces_detail.png'}
+
+    #Flags and pictures, decoded once and kept at display size
+    image_cache = ImageCache()
+    FLAG_SIZE = (160, 120) #pixels, flags are drawn at the end of bars
+    PICTURE_SIZE = (320, 320) #pixels, pictures are drawn in legends
+
+    #Names of player ids of datasets, loaded from registry_path the first time a plot needs them
+    registry = None
+    registry_path = 'data/players_registry.parquet'
+
+
+    def load_dataset(path, plot_name):
+        '''
+        Loads from parquet file only columns needed by a plot
+
+        Args:
+            path(str): path of aggregated dataset (or players stats) parquet file
+            plot_name(str): name of Plot method
+
+        Returns:
+            df(DataFrame)
+
+        '''
+
+        return pd.read_parquet(path, columns = Plot.COLUMNS[plot_name])
+
+
+    def player_names(values):
+        '''
+        Names of players to show, from ids of PlayerRegistry. Datasets saved with names instead of ids are returned as they are
+
+        Args:
+            values(Series): player ids (or names)
+
+        Returns:
+            names(list)
+
+        '''
+
+        if not pd.api.types.is_integer_dtype(values):
+            return list(values)
+
+        if Plot.registry is None:
+            Plot.registry = load_registry(Plot.registry_path)
+
+        return list(Plot.registry.decode(values))
     
     
-    def plot_surface_win(df):
+    def plot_surface_win(df, output_dir = 'output/img'):
 
         '''
         Plots wins and loses based on surface
         Args:
-            df(Dataframe): clean dataset
+            df(Dataframe): aggregated dataset from cleaning.build_aggregates
+            output_dir(str): folder to save the plot
         Returns:
+            filename(str): path of saved plot
 
         '''
 
+        import seaborn as sns #slow to import, only loaded by plots using it
+
+        surface_df = df.groupby('Surface', observed = True)[['wins', 'total']].sum()
+        surface_df['losses'] = surface_df['total'] - surface_df['wins']
+        surfaces = [str(surface) for surface in surface_df.index] #same order in bars and texts
+
+        #one row per surface and result, as countplot would count them
+        bars_df = surface_df[['wins', 'losses']].rename(columns = {'wins': 'Win', 'losses': 'Lost'}).reset_index().melt(id_vars = 'Surface', var_name = 'result', value_name = 'games')
+        bars_df['Surface'] = bars_df['Surface'].astype(str)
+
         fig = plt.figure()
         ax = fig.add_subplot(111)
-        sns.countplot(x=df.Surface, hue =df.Is_winner, hue_order = [True, False])
+        sns.barplot(x = 'Surface', y = 'games', hue = 'result', hue_order = ['Win', 'Lost'], order = surfaces, data = bars_df)
 
 
         #PLot customization
-        ax.legend(labels = ['Win', 'Lost'])
+        ax.legend(title = None) #labels are Win and Lost from result column
         ax.spines['right'].set_visible(False)
         ax.spines['top'].set_visible(False)
         plt.ylabel('Number of games') 
@@ -43,78 +116,53 @@ class Plot():
         plt.title('In %, Win Rate', fontsize = 18, pad = 20)
 
         #to show percentage of win
-        for pos, surface in enumerate(df.Surface.unique()):
-            wins = df[(df.Surface == surface)].Is_winner.sum()
-            total = df[(df.Surface == surface)].Is_winner.count()
+        for pos, (wins, total) in enumerate(zip(surface_df['wins'], surface_df['total'])):
             number = round((wins / total) * 100,1)
             plt.text(pos +0.2, wins + 5, f'{number} %',fontsize = 13, ha = 'right')
 
             
-        filename = 'output/img/wins_surface.png'
+        filename = f"{output_dir}/{Plot.FILENAMES['plot_surface_win']}"
 
         plt.savefig(filename,bbox_inches='tight',pad_inches=0.2)
+        plt.close(fig) #free memory of figure once saved
+
+        return filename
 
 
-    def plot_losses_detail(df):
+    def losses_detail_table(df):
         '''
-        Plots losses percentage based on opponent is great server and leftie
+        Loss rate based on surface, opponent being leftie and opponent being great server. Input is not modified.
         Args:
-            df(Dataframe): clean dataset
+            df(Dataframe): aggregated dataset from cleaning.build_aggregates
         Returns:
+            b(Dataframe): one row per Surface, leftie and great_serve with columns wins, total and loss_perc
 
         '''
-        # new column with boolean values if leftie or not
-        df['leftie'] = np.where(df['Plays'] == 'Left-handed', 1, np.where(df['Plays'] == 'Right-handed', 0, np.NaN))
 
-        total_df = df.dropna(subset=['Plays']).groupby(['Surface','leftie','great_serve']).count()[['ATP']] #this is to know total number of games per surface, great server and leftie
-        #In b dataframe we count number of wins
-        b = df.dropna(subset=['Plays']).groupby(['Surface','leftie','great_serve']).sum()[['Is_winner']].reset_index()
+        known = df.dropna(subset=['Plays'])
+        leftie = pd.Series(np.where(known['Plays'] == 'Left-handed', 1, np.where(known['Plays'] == 'Right-handed', 0, np.nan)), index = known.index, name = 'leftie') #1 if leftie, 0 if right-handed
 
-        def get_total_games(row, total_df):
-            '''
-            Mini function to get in b dataframe total number of games based on surface, great server and leftie
-            Args:
-                row(dataframe): row dataframe from apply function
-                total_df(Dataframe): dataframe with total number of games info
-            Returns:
-                total(int): number of games
+        b = known.groupby([known['Surface'], leftie, known['great_serve']], observed = True).agg(wins = ('wins', 'sum'), total = ('total', 'sum')).reset_index()
 
-            '''
-            surface = row['Surface']
-            leftie = row['leftie']
-            great_serve = row['great_serve']
-            
-            total = total_df.loc[surface].loc[leftie].loc[great_serve]
-            return total
-        
-        b['total'] = b.apply(lambda x: get_total_games(x,total_df), axis = 1)
+        b['loss_perc'] = (b['total'] - b['wins']) / b['total'] * 100
 
-        def get_rate_loss(row):
-            '''
-            Mini function to get rate loss in b dataframe 
-            Args:
-                row(dataframe): row dataframe from apply function
+        return b
 
-            Returns:
-                loss_perc(float): rate loss
 
+    def plot_losses_detail(df, output_dir = 'output/img'):
+        '''
+        Plots losses percentage based on opponent is great server and leftie
+        Args:
+            df(Dataframe): aggregated dataset from cleaning.build_aggregates
+            output_dir(str): folder to save the plot
+        Returns:
+            filename(str): path of saved plot
 
+        '''
 
-            '''
-            surface = row['Surface']
-            leftie = row['leftie']
-            great_serve = row['great_serve']
-            
-            
-            
-            
-            total = row['total']
-            
-            loss_perc = (total - row['Is_winner']) / total * 100
-            
-            return loss_perc
+        import seaborn as sns
 
-        b['loss_perc'] = b.apply(lambda x: get_rate_loss(x), axis = 1)
+        b = Plot.losses_detail_table(df)
 
         #Here comes the actual plotting
 
@@ -135,19 +183,24 @@ class Plot():
 
         plt.title('Losses details', fontsize = 18, pad = 20)
 
-        filename = 'output/img/losses_details.png'
+        filename = f"{output_dir}/{Plot.FILENAMES['plot_losses_detail']}"
 
         plt.savefig(filename,bbox_inches='tight',pad_inches=0.2)
+        plt.close(fig) #free memory of figure once saved
+
+        return filename
 
-    def plot_top_countries_defeated(df):
+    def plot_top_countries_defeated(df, output_dir = 'output/img'):
         '''
         Plots top countries defeated by main player
         Args:
-            df(Dataframe): clean dataset
+            df(Dataframe): aggregated dataset from cleaning.build_aggregates
+            output_dir(str): folder to save the plot
         Returns:
+            filename(str): path of saved plot
 
         '''
-        a = df.groupby('Country').sum().reset_index().sort_values('Is_winner', ascending =False).head(5).sort_values('Is_winner') #reorder to get top1 at the top in plot 
+        a = df.groupby('Country', observed = True)[['wins']].sum().reset_index().sort_values('wins', ascending =False).head(5).sort_values('wins') #reorder to get top1 at the top in plot 
 
                         
         def pos_image(x, y, pays, haut):
@@ -177,7 +230,7 @@ class Plot():
             pays = countries.get(pays).alpha2.lower()
             fichier = "/usr/share/iso-flags-png-320x240"
             fichier += f"/{pays}.png"
-            im = mpimg.imread(fichier)
+            im = Plot.image_cache.get(fichier, Plot.FLAG_SIZE)
             ratio = 25
             w = ratio * haut
             ax.imshow(im, extent = (x -w, x, y  , y + haut), aspect = 'auto', zorder = 2)
@@ -189,9 +242,9 @@ class Plot():
 
         haut= 0.9
 
-        r = ax.barh(y = a.Country, width = a.Is_winner, height = haut, zorder=1)
+        r = ax.barh(y = a.Country.astype(str), width = a.wins, height = haut, zorder=1)
 
-        countries_list = list(a.set_index('Country').Is_winner.reset_index().to_records(index=False))
+        countries_list = list(a.set_index('Country').wins.reset_index().to_records(index=False))
 
         y_bar = [rectangle.get_y() for rectangle in r]
 
@@ -213,9 +266,12 @@ class Plot():
 
         plt.title('Top 5 defeated nationalities', fontsize = 18, pad = 20)
 
-        filename = 'output/img/top_countries_defeated.png'
+        filename = f"{output_dir}/{Plot.FILENAMES['plot_top_countries_defeated']}"
 
         plt.savefig(filename,bbox_inches='tight',pad_inches=0.2)
+        plt.close(fig) #free memory of figure once saved
+
+        return filename
 
         
         
@@ -249,28 +305,30 @@ class Plot():
         def set_image(self, image_path, image_stretch=(9, 9)):
 
 
-            self.image_data = plt.imread(image_path)
+            self.image_data = Plot.image_cache.get(image_path, Plot.PICTURE_SIZE)
 
             self.image_stretch = image_stretch
 
 
-    def plot_top_nemesis(df):
+    def plot_top_nemesis(df, output_dir = 'output/img'):
         '''
         Plots top nemesis of main player
         Args:
-            df(Dataframe): clean dataset
+            df(Dataframe): aggregated dataset from cleaning.build_aggregates
+            output_dir(str): folder to save the plot
         Returns:
+            filename(str): path of saved plot
 
         '''
-        wins = df.groupby('Opponent').sum().Is_winner
-        total = df.groupby('Opponent').count().Is_winner
-        losses = total - wins
-        losses_df = losses.sort_values(ascending = False).head(5).reset_index() #This is the dataframe from where to plot
+        opponents = df.groupby('Opponent')[['wins', 'total']].sum()
+        losses = opponents['total'] - opponents['wins']
+        losses_df = losses.rename('losses').sort_values(ascending = False).head(5).reset_index() #This is the dataframe from where to plot
 
 
         fig = plt.figure(figsize=(11.5, 10))
         ax = fig.add_subplot(111)
 
+        losses_df['Opponent'] = Plot.player_names(losses_df.Opponent) #ids are only turned into names here, to show them
         nemesis_list = losses_df.Opponent.unique()
 
         list_plot = []
@@ -286,7 +344,7 @@ class Plot():
             custom_handler.set_image(f"src/img/{surname}.jpg",image_stretch=(120, 120))
             handler_map[plot]=custom_handler
 
-            games_lost = int(losses_df.set_index('Opponent').loc[player,'Is_winner'])
+            games_lost = int(losses_df.set_index('Opponent').loc[player,'losses'])
 
             legend_text.append(f'\n{player}\n{games_lost} matches.')
 
@@ -309,21 +367,27 @@ class Plot():
         ax.axis('off')
 
 
-        filename = 'output/img/top_nemesis.png'
+        filename = f"{output_dir}/{Plot.FILENAMES['plot_top_nemesis']}"
 
         plt.savefig(filename,bbox_inches='tight',pad_inches=0.2)
+        plt.close(fig) #free memory of figure once saved
+
+        return filename
 
-    def plot_box_aces(df_players):
+    def plot_box_aces(df_players, main_player = 'Rafael Nadal', output_dir = 'output/img'):
         '''
         Plots boxplot with stats all players Aces% and reports main player stat
         Args:
             df_players(DataFrame): players stats dataframe clean
+            main_player(str): player to report, name as in players stats
+            output_dir(str): folder to save the plot
 
         Returns:
+            filename(str): path of saved plot
         
         '''
 
-        main_player = 'Rafael Nadal'
+        import seaborn as sns
 
         main_player_aces = round(df_players.set_index('name').loc[main_player,'Ace %'],1)
 
@@ -384,8 +448,11 @@ class Plot():
 
         plt.title('Ace % Distribution', fontsize = 18, pad = 20)
 
-        filename = 'output/img/aces_detail.png'
+        filename = f"{output_dir}/{Plot.FILENAMES['plot_box_aces']}"
 
         plt.savefig(filename,bbox_inches='tight',pad_inches=0.2)
+        plt.close(fig) #free memory of figure once saved
+
+        return filename
         
 
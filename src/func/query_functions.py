@@ -0,0 +1,254 @@
+import numpy as np
+import pandas as pd
+
+
+'''
+Collection of functions used for answering win/loss questions over a match table without filtering the whole frame each time
+'''
+
+
+class MatchIndex():
+    '''
+    Sorted index of games in long format (one row per game and player, as from cleaning.long_format or cleaning.prepare_dataset), built once.
+    Each game is a key (player, opponent, surface, day) packed in one int64, keys are sorted and wins are cumulated in the same order,
+    so any count of wins and games between two dates is two binary searches and a subtraction.
+    A second index without opponent answers questions about a player against everybody.
+
+        index = MatchIndex(clean_df)
+        nadal, djokovic, federer = registry.encode(['Rafael Nadal', 'Novak Djokovic', 'Roger Federer'])
+        index.head_to_head(nadal, djokovic, surface = 'Clay', start = 2010)
+        index.query([nadal] * 2, [djokovic, federer])   #thousands of pairs at once
+
+    Players are given as in Player and Opponent columns of the table, ids of PlayerRegistry in clean games. MatchIndex.from_games indexes a table
+    with one row per game (Winner and Loser columns), from both sides, with Kaggle names.
+    '''
+
+    def __init__(self, df):
+        '''
+        Args:
+            df(DataFrame): games with columns Player, Opponent, Surface, Date ('dd/mm/yyyy' or datetime) and Is_winner
+        '''
+
+        players = df.Player.to_numpy(dtype = object)
+        opponents = df.Opponent.to_numpy(dtype = object)
+
+        codes, names = pd.factorize(np.concatenate([players, opponents]))
+        self.names = names
+        self.ids = {name: i for i, name in enumerate(names)}
+        player = codes[:len(df)].astype(np.int64)
+        opponent = codes[len(df):].astype(np.int64)
+
+        surface, surfaces = pd.factorize(df.Surface.astype(object))
+        self.surfaces = list(surfaces)
+        surface = np.where(surface < 0, len(self.surfaces), surface).astype(np.int64) #unknown surface in its own bucket
+        self.n_surfaces = len(self.surfaces) + 1
+
+        #days from first game, 0 for games without date (only counted when no date range is given)
+        dates = df.Date if pd.api.types.is_datetime64_any_dtype(df.Date) else pd.to_datetime(df.Date, dayfirst = True, errors = 'coerce')
+        days = dates.to_numpy(dtype = 'datetime64[D]')
+        valid = ~np.isnat(days)
+        self.first_day = days[valid].min() if valid.any() else np.datetime64('2000-01-01')
+        day = np.zeros(len(df), dtype = np.int64)
+        day[valid] = (days[valid] - self.first_day).astype(np.int64) + 1
+        self.span = int(day.max(initial = 0)) + 2
+
+        if (len(names) ** 2) * self.n_surfaces * self.span >= 2**62:
+            raise ValueError('Too many players or days to pack games in int64 keys')
+
+        wins = df.Is_winner.to_numpy(dtype = bool)
+        known = (player >= 0) & (opponent >= 0)
+
+        pair = player * len(names) + opponent
+        self.pair_keys, self.pair_wins = self.sorted_keys((pair * self.n_surfaces + surface) * self.span + day, wins, known)
+        self.player_keys, self.player_wins = self.sorted_keys((player * self.n_surfaces + surface) * self.span + day, wins, known)
+
+    @classmethod
+    def from_games(cls, df):
+        '''
+        Index of a table with one row per game, each game seen from winner and loser side
+
+        Args:
+            df(DataFrame): games with columns Winner, Loser, Surface and Date, as from cleaning.read_kaggle_dataset
+
+        Returns:
+            index(MatchIndex)
+
+        '''
+
+        from src.func.cleaning_functions import long_format
+
+        return cls(long_format(df[['Winner', 'Loser', 'Surface', 'Date']]))
+
+    def sorted_keys(self, keys, wins, keep):
+        '''
+        Sorts keys and cumulates wins in the same order
+
+        Args:
+            keys(ndarray): int64 keys of games
+            wins(ndarray): bool, game won
+            keep(ndarray): bool, games to index
+
+        Returns:
+            keys(ndarray): sorted keys
+            cum_wins(ndarray): wins of games before each position, one more element than keys
+
+        '''
+
+        keys = keys[keep]
+        order = np.argsort(keys, kind = 'stable')
+        cum_wins = np.zeros(len(keys) + 1, dtype = np.int64)
+        np.cumsum(wins[keep][order], out = cum_wins[1:])
+
+        return keys[order], cum_wins
+
+    def lookup(self, names):
+        '''
+        Ids of names
+
+        Args:
+            names(iterable): players as in table
+
+        Returns:
+            ids(ndarray): int64, -1 for names not in table
+
+        '''
+
+        return np.fromiter((self.ids.get(name, -1) for name in names), dtype = np.int64)
+
+    def day(self, date, end = False):
+        '''
+        Position of a date in keys
+
+        Args:
+            date(int, str or Timestamp): year (first day of it, or last day if end) or date
+            end(bool): date is end of range
+
+        Returns:
+            day(int): between 1 and span - 1, or 0 for an end before first game (empty range)
+
+        '''
+
+        if isinstance(date, (int, np.integer)):
+            date = f'{date}-12-31' if end else f'{date}-01-01'
+
+        day = int((np.datetime64(pd.Timestamp(date), 'D') - self.first_day).astype(np.int64)) + 1
+
+        if end and day < 1:
+            return 0
+
+        return min(max(day, 1), self.span - 1)
+
+    def counts(self, keys, cum_wins, groups, surface, start, end):
+        '''
+        Wins and games of each group between two dates, on a surface or all of them
+
+        Args:
+            keys(ndarray): sorted keys, pair_keys or player_keys
+            cum_wins(ndarray): cumulated wins of keys
+            groups(ndarray): pair or player ids, -1 for unknown
+            surface(str): surface, all if None
+            start(int, str or Timestamp): first day, optional
+            end(int, str or Timestamp): last day, optional
+
+        Returns:
+            wins(ndarray)
+            total(ndarray)
+
+        '''
+
+        first = self.day(start) if start is not None else 0 if end is None else 1 #games without date only without date range
+        last = self.span - 1 if end is None else self.day(end, end = True)
+
+        if surface is None:
+            surface_codes = np.arange(self.n_surfaces)
+        elif surface in self.surfaces:
+            surface_codes = np.array([self.surfaces.index(surface)])
+        else:
+            surface_codes = np.array([], dtype = np.int64)
+
+        bases = (groups[:, None] * self.n_surfaces + surface_codes[None, :]) * self.span #one range per group and surface
+        lo = np.searchsorted(keys, bases + first, 'left')
+        hi = np.maximum(np.searchsorted(keys, bases + last, 'right'), lo)
+
+        unknown = groups < 0
+        wins = (cum_wins[hi] - cum_wins[lo]).sum(axis = 1)
+        total = (hi - lo).sum(axis = 1)
+        wins[unknown] = 0
+        total[unknown] = 0
+
+        return wins, total
+
+    def query(self, players, opponents = None, surface = None, start = None, end = None):
+        '''
+        Wins and losses of many players, or pairs of players, at once
+
+        Args:
+            players(list): players, ids or names as in table
+            opponents(list): opponents, same length as players, or one player for all. Against everybody if None
+            surface(str): surface, all if None
+            start(int, str or Timestamp): year or first day, optional
+            end(int, str or Timestamp): year or last day, optional
+
+        Returns:
+            df(DataFrame): one row per query with columns player, opponent, wins, losses, total
+
+        '''
+
+        players = list(players) if isinstance(players, (list, tuple, np.ndarray, pd.Series)) else [players]
+        player = self.lookup(players)
+
+        if opponents is None:
+            wins, total = self.counts(self.player_keys, self.player_wins, player, surface, start, end)
+        else:
+            opponents = list(opponents) if isinstance(opponents, (list, tuple, np.ndarray, pd.Series)) else [opponents] * len(players)
+            opponent = self.lookup(opponents)
+            pair = np.where((player >= 0) & (opponent >= 0), player * len(self.names) + opponent, -1)
+            wins, total = self.counts(self.pair_keys, self.pair_wins, pair, surface, start, end)
+
+        return pd.DataFrame({'player': players, 'opponent': opponents, 'wins': wins, 'losses': total - wins, 'total': total})
+
+    def head_to_head(self, player, opponent = None, surface = None, start = None, end = None):
+        '''
+        Wins and losses of player against opponent (or everybody)
+
+        Args:
+            player(int or str): player id or name as in table
+            opponent(int or str): opponent, against everybody if None
+            surface(str): surface, all if None
+            start(int, str or Timestamp): year or first day, optional
+            end(int, str or Timestamp): year or last day, optional
+
+        Returns:
+            result(dict): wins, losses and total
+
+        '''
+
+        player_id = self.lookup([player])
+
+        if opponent is None:
+            wins, total = self.counts(self.player_keys, self.player_wins, player_id, surface, start, end)
+        else:
+            opponent_id = self.ids.get(opponent, -1)
+            pair = player_id * len(self.names) + opponent_id if player_id[0] >= 0 and opponent_id >= 0 else np.array([-1])
+            wins, total = self.counts(self.pair_keys, self.pair_wins, pair, surface, start, end)
+
+        return {'wins': int(wins[0]), 'losses': int(total[0] - wins[0]), 'total': int(total[0])}
+
+    def surface_split(self, player, opponent = None, start = None, end = None):
+        '''
+        Wins and losses of player against opponent (or everybody) on each surface
+
+        Args:
+            player(int or str): player id or name as in table
+            opponent(int or str): opponent, against everybody if None
+            start(int, str or Timestamp): year or first day, optional
+            end(int, str or Timestamp): year or last day, optional
+
+        Returns:
+            df(DataFrame): one row per surface with columns wins, losses, total
+
+        '''
+
+        results = {surface: self.head_to_head(player, opponent, surface, start, end) for surface in self.surfaces}
+
+        return pd.DataFrame.from_dict(results, orient = 'index').rename_axis('Surface')
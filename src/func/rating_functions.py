@@ -0,0 +1,259 @@
+import numpy as np
+import pandas as pd
+
+
+'''
+Collection of functions used for rating players with Elo, overall and per surface, from the history of games
+'''
+
+
+class EloRatings():
+    '''
+    Elo ratings of all players, kept in arrays indexed by an integer id per player (and per surface for surface Elo).
+    K factor decreases with games played, as in tennis Elo by FiveThirtyEight: K = k / (games + offset) ** shape.
+
+    Games are processed in date order by batches in which no player appears twice: games of a batch do not depend on each other,
+    so they are updated all at once with array operations and results are the same as one game at a time.
+    New games are added with update, starting from current ratings, without going through history again.
+    '''
+
+    def __init__(self, k = 250, offset = 5, shape = 0.4, initial = 1500):
+        '''
+        Args:
+            k(float): scale of K factor
+            offset(float): games added to games played in K factor, so first games do not move rating too much
+            shape(float): how fast K factor decreases with games played
+            initial(float): rating of a new player
+        '''
+
+        self.k = k
+        self.offset = offset
+        self.shape = shape
+        self.initial = initial
+
+        self.ids = {} #name -> id
+        self.names = []
+        self.surfaces = []
+        self.rating = np.zeros(0)
+        self.games = np.zeros(0, dtype = np.int32)
+        self.surface_rating = np.zeros((0, 0)) #surfaces x players
+        self.surface_games = np.zeros((0, 0), dtype = np.int32)
+
+    def player_ids(self, names):
+        '''
+        Ids of names, new players get the next ids and initial rating
+
+        Args:
+            names(ndarray): player names
+
+        Returns:
+            ids(ndarray): int64
+
+        '''
+
+        codes, uniques = pd.factorize(names)
+        new = [name for name in uniques if name not in self.ids]
+        for name in new:
+            self.ids[name] = len(self.names)
+            self.names.append(name)
+
+        if new:
+            self.rating = np.concatenate([self.rating, np.full(len(new), float(self.initial))])
+            self.games = np.concatenate([self.games, np.zeros(len(new), dtype = np.int32)])
+            self.surface_rating = np.hstack([self.surface_rating, np.full((len(self.surfaces), len(new)), float(self.initial))])
+            self.surface_games = np.hstack([self.surface_games, np.zeros((len(self.surfaces), len(new)), dtype = np.int32)])
+
+        return np.array([self.ids[name] for name in uniques], dtype = np.int64)[codes]
+
+    def surface_ids(self, surfaces):
+        '''
+        Ids of surfaces, new surfaces start with initial rating for all players
+
+        Args:
+            surfaces(ndarray): surface of each game, missing ones rated as 'Unknown'
+
+        Returns:
+            ids(ndarray): int64
+
+        '''
+
+        codes, uniques = pd.factorize(pd.Series(surfaces, dtype = object).fillna('Unknown'))
+        for surface in uniques:
+            if surface not in self.surfaces:
+                self.surfaces.append(surface)
+                self.surface_rating = np.vstack([self.surface_rating, np.full((1, len(self.names)), float(self.initial))])
+                self.surface_games = np.vstack([self.surface_games, np.zeros((1, len(self.names)), dtype = np.int32)])
+
+        return np.array([self.surfaces.index(surface) for surface in uniques], dtype = np.int64)[codes]
+
+    def k_factor(self, games):
+        '''
+        K factor of players with games played
+
+        Args:
+            games(ndarray)
+
+        Returns:
+            k(ndarray)
+
+        '''
+
+        return self.k / (games + self.offset) ** self.shape
+
+    def batches(self, winner, loser):
+        '''
+        Splits games in consecutive batches in which no player appears twice
+
+        Args:
+            winner(ndarray): ids of winners in date order
+            loser(ndarray): ids of losers in date order
+
+        Returns:
+            starts(list): position of first game of each batch, and number of games at the end
+
+        '''
+
+        n_games = len(winner)
+        players = np.concatenate([winner, loser])
+        positions = np.concatenate([np.arange(n_games), np.arange(n_games)])
+
+        #previous game of same player for each appearance, -1 if first one
+        order = np.lexsort((positions, players))
+        previous = np.full(2 * n_games, -1)
+        same = players[order][1:] == players[order][:-1]
+        previous_sorted = np.full(2 * n_games, -1)
+        previous_sorted[1:][same] = positions[order][:-1][same]
+        previous[order] = previous_sorted
+        last_seen = np.maximum(previous[:n_games], previous[n_games:]).tolist()
+
+        starts = [0]
+        for position, seen in enumerate(last_seen):
+            if seen >= starts[-1]:
+                starts.append(position)
+        starts.append(n_games)
+
+        return starts
+
+    def update(self, df):
+        '''
+        Rates games in date order (ties keep order of df) starting from current ratings
+
+        Args:
+            df(DataFrame): games with columns Winner, Loser, Surface and Date ('dd/mm/yyyy'), as from cleaning.read_kaggle_dataset
+
+        Returns:
+            ratings(DataFrame): same index as df (match_id), ratings before each game in columns winner_elo, loser_elo,
+                                winner_surface_elo and loser_surface_elo
+
+        '''
+
+        dates = pd.to_datetime(df.Date, dayfirst = True, errors = 'coerce').to_numpy()
+        order = np.argsort(dates, kind = 'stable') #games without date at the end
+
+        winner = self.player_ids(df.Winner.to_numpy(dtype = object)[order])
+        loser = self.player_ids(df.Loser.to_numpy(dtype = object)[order])
+        surface = self.surface_ids(df.Surface.to_numpy(dtype = object)[order])
+
+        n_players = len(self.names)
+        surface_rating = self.surface_rating.reshape(-1) #views, updated in place
+        surface_games = self.surface_games.reshape(-1)
+        winner_surface = surface * n_players + winner
+        loser_surface = surface * n_players + loser
+
+        before = np.empty((len(df), 4))
+        starts = self.batches(winner, loser)
+
+        for start, end in zip(starts[:-1], starts[1:]):
+            w, l = winner[start:end], loser[start:end]
+            ws, ls = winner_surface[start:end], loser_surface[start:end]
+
+            before[start:end, 0] = self.rating[w]
+            before[start:end, 1] = self.rating[l]
+            before[start:end, 2] = surface_rating[ws]
+            before[start:end, 3] = surface_rating[ls]
+
+            expected = 1 / (1 + 10 ** ((before[start:end, 1] - before[start:end, 0]) / 400)) #probability of winner winning
+            self.rating[w] += self.k_factor(self.games[w]) * (1 - expected)
+            self.rating[l] -= self.k_factor(self.games[l]) * (1 - expected)
+            self.games[w] += 1
+            self.games[l] += 1
+
+            expected = 1 / (1 + 10 ** ((before[start:end, 3] - before[start:end, 2]) / 400))
+            surface_rating[ws] += self.k_factor(surface_games[ws]) * (1 - expected)
+            surface_rating[ls] -= self.k_factor(surface_games[ls]) * (1 - expected)
+            surface_games[ws] += 1
+            surface_games[ls] += 1
+
+        ratings = np.empty_like(before)
+        ratings[order] = before
+
+        return pd.DataFrame(ratings.astype('float32'), index = df.index.rename('match_id'),
+                            columns = ['winner_elo', 'loser_elo', 'winner_surface_elo', 'loser_surface_elo'])
+
+    def table(self):
+        '''
+        Current ratings of all players
+
+        Args:
+
+        Returns:
+            df(DataFrame): one row per player with columns name, elo, games and for each surface elo_{surface} and games_{surface}
+
+        '''
+
+        df = pd.DataFrame({'name': self.names, 'elo': self.rating, 'games': self.games})
+        for i, surface in enumerate(self.surfaces):
+            df[f'elo_{surface}'] = self.surface_rating[i]
+            df[f'games_{surface}'] = self.surface_games[i]
+
+        return df
+
+    @classmethod
+    def from_table(cls, df, **kwargs):
+        '''
+        Ratings saved with table, to go on updating them
+
+        Args:
+            df(DataFrame): from table
+            kwargs: parameters of EloRatings, must be the same used to build the table
+
+        Returns:
+            ratings(EloRatings)
+
+        '''
+
+        elo = cls(**kwargs)
+        elo.names = df.name.to_list()
+        elo.ids = {name: i for i, name in enumerate(elo.names)}
+        elo.rating = df.elo.to_numpy(dtype = float).copy()
+        elo.games = df.games.to_numpy(dtype = np.int32).copy()
+        elo.surfaces = [column[4:] for column in df.columns if column.startswith('elo_')]
+        elo.surface_rating = np.array([df[f'elo_{surface}'].to_numpy(dtype = float) for surface in elo.surfaces]).reshape(len(elo.surfaces), len(df))
+        elo.surface_games = np.array([df[f'games_{surface}'].to_numpy(dtype = np.int32) for surface in elo.surfaces]).reshape(len(elo.surfaces), len(df))
+
+        return elo
+
+
+def join_ratings(clean_df, ratings):
+    '''
+    Adds ratings before each game, from side of Player, to games in long format
+
+    Args:
+        clean_df(DataFrame): games with match_id and Is_winner columns, as from clean.py
+        ratings(DataFrame): from EloRatings.update, indexed by match_id
+
+    Returns:
+        clean_df(DataFrame): copy with new columns Elo, Opponent_elo, Surface_elo and Opponent_surface_elo
+
+    '''
+
+    game = ratings.reindex(clean_df.match_id.to_numpy())
+    won = clean_df.Is_winner.to_numpy(dtype = bool)
+
+    clean_df = clean_df.copy()
+    clean_df['Elo'] = np.where(won, game.winner_elo, game.loser_elo)
+    clean_df['Opponent_elo'] = np.where(won, game.loser_elo, game.winner_elo)
+    clean_df['Surface_elo'] = np.where(won, game.winner_surface_elo, game.loser_surface_elo)
+    clean_df['Opponent_surface_elo'] = np.where(won, game.loser_surface_elo, game.winner_surface_elo)
+
+    return clean_df
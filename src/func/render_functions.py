@@ -0,0 +1,96 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
+matplotlib.use('Agg') #charts are only saved to files, no window
+import matplotlib.pyplot as plt
+from src.func.plotting_functions import Plot
+
+
+'''
+Collection of functions used for rendering charts in parallel, without display
+'''
+
+
+def timed_render(plot):
+    '''
+    Runs a plot function, closing any figure left open afterwards so memory stays flat
+
+    Args:
+        plot(callable): function drawing and saving a chart
+
+    Returns:
+        result(float or str): seconds to render the chart, or error message if it failed
+
+    '''
+
+    start = time.perf_counter()
+    try:
+        plot()
+    except Exception as error:
+        return f'{type(error).__name__}: {error}'
+    else:
+        return time.perf_counter() - start
+    finally:
+        plt.close('all')
+
+
+def render_chart(job):
+    '''
+    Loads the columns a chart needs and renders it. Runs inside a worker process.
+
+    Args:
+        job(tuple): plot_name (name of Plot method), dataset path (or DataFrame already in memory), dict of extra arguments of the Plot method
+
+    Returns:
+        plot_name(str)
+        result(float or str): seconds to load and render the chart, or error message if it failed
+
+    '''
+
+    plot_name, dataset, kwargs = job
+
+    if isinstance(dataset, str):
+        plot = lambda: getattr(Plot, plot_name)(Plot.load_dataset(dataset, plot_name), **kwargs)
+    else:
+        plot = lambda: getattr(Plot, plot_name)(dataset[Plot.COLUMNS[plot_name]], **kwargs)
+
+    return plot_name, timed_render(plot)
+
+
+def init_render(image_cache_dir, registry_path = None):
+    '''
+    Sets disk cache of flags and pictures, and registry of player names, in worker process
+
+    Args:
+        image_cache_dir(str): folder for resized images, no disk cache if None
+        registry_path(str): path of PlayerRegistry, by default Plot.registry_path
+
+    Returns:
+
+    '''
+
+    Plot.image_cache.disk_dir = image_cache_dir
+    if registry_path is not None:
+        Plot.registry_path = registry_path
+
+
+def render_charts(jobs, n_workers = None, image_cache_dir = None, registry_path = None):
+    '''
+    Renders charts with a pool of processes, one chart per task
+
+    Args:
+        jobs(list): tuples as in render_chart
+        n_workers(int): number of processes, by default number of cores
+        image_cache_dir(str): folder shared by workers for resized flags and pictures, optional
+        registry_path(str): path of PlayerRegistry to show names of player ids, optional
+
+    Returns:
+        times(dict): Keys: plot_name, Values: seconds or error message
+
+    '''
+
+    n_workers = min(n_workers or os.cpu_count(), len(jobs)) or 1
+
+    with ProcessPoolExecutor(max_workers = n_workers, initializer = init_render, initargs = (image_cache_dir, registry_path)) as pool:
+        return dict(pool.map(render_chart, jobs))
@@ -1,23 +1,334 @@
 import re
 import time
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.support.ui import Select
+import queue
+import threading
+from bs4 import BeautifulSoup, SoupStrainer
 import tqdm
 import json
-import pandas as pd
+import os
+from array import array
 
+#selenium and requests are imported where used: each backend only loads its own library
 
 
 
 
+
+RANKING_ROWS = '#rankingsTable tbody tr' #css selector of rows in ranking table
+STATS_TABLES = 'table.table.table-condensed.table-hover.table-striped' #css selector of tables in player stats
+
+
+#Only these parts of the pages are parsed, rest of html is skipped while parsing
+RANKING_STRAINER = SoupStrainer(['thead', 'tbody'])
+PROFILE_STRAINER = SoupStrainer('table', attrs = {'class': 'table table-condensed text-nowrap'})
+STATS_STRAINER = SoupStrainer('table', attrs = {'class': 'table table-condensed table-hover table-striped'})
+
+
+def parse_players_url(page, players_urls, history = None, season = None):
+    '''
+    Extracts all players links from html of ranking table and adds to dictionary if new player found.
+    If history is given, rank and points of each row are added to it in the same pass.
+
+    Args:
+        page(str): html
+        players_urls(dict): dictionary of players in use
+        history(RankingHistory): rankings of seasons, optional
+        season(int): season of ranking table, needed with history
+
+    Returns:
+        players_urls(dict): dictionary of players updated
+
+    '''
+
+    soup = BeautifulSoup(page, features="lxml", parse_only=RANKING_STRAINER)
+
+    if history is not None:
+        headers = [header.get_text(strip = True).lower() for header in soup.select('thead th')]
+        points_column = headers.index('points') if 'points' in headers else -1 #last column if header not found
+
+        for row in soup.find('tbody').find_all('tr'):
+            player = row.find('a')
+            cells = [cell.get_text(strip = True) for cell in row.find_all('td')]
+            if player is not None and len(cells) > 1:
+                history.append(season, player_id(player['href']), player.text, cells[0], cells[points_column]) #rank in first column
+
+    players_html = soup.find('tbody').find_all('a')
+    for player in players_html:
+
+        if player.text in players_urls:
+            continue
+
+        else:
+            name = player.text
+            url_path = player['href']
+
+            players_urls[name] = url_path
+    
+    return players_urls
+
+
+def player_id(url_path):
+    '''
+    Id of player in website, from link of player page
+
+    Args:
+        url_path(str): link as in ranking table, as '/playerProfile?playerId=4742'
+
+    Returns:
+        player_id(int): -1 if link has no id
+
+    '''
+
+    found = re.search(r'playerId=(\d+)', url_path)
+
+    return int(found.group(1)) if found else -1
+
+
+def parse_player_profile(page):
+    '''
+    Extracts all info related to player profile from html of player page
+
+    Args:
+        page(str): html
+
+    Returns:
+        temp_dict(dict): dictionary with all profile data, None if profile table not found
+
+    '''
+
+    temp_dict = {}
+
+    soup = BeautifulSoup(page ,features="lxml", parse_only=PROFILE_STRAINER)
+
+    try:
+        
+        player_html = soup.find_all('table', class_='table table-condensed text-nowrap')[0] #I keep only the first table
+    
+    except IndexError:
+        return None
+    
+    else:
+        rows = player_html.find_all('tr')
+
+        for row in rows:
+            col_name = row.find('th').text
+            value = row.find('td').text
+
+            temp_dict[col_name] = value
+
+        return temp_dict
+
+
+def parse_player_stats(page):
+    '''
+    Extracts all stats data from html of player stats
+
+    Args:
+        page(str): html
+
+    Returns:
+        temp_dict(dict): dictionary with all stats data
+
+    '''
+
+    temp_dict = {}
+
+    soup = BeautifulSoup(page, features="lxml", parse_only=STATS_STRAINER)
+
+    player_html = soup.find_all('table', class_='table table-condensed table-hover table-striped')
+    
+    for table in player_html[0:3]:#I want only first three tables
+
+        rows = table.find_all('tr')
+
+        for row in rows[1:]: #first row is a header
+
+            col_name = row.find('td').text
+            value = row.find('th').text
+
+            temp_dict[col_name] = value
+        
+    return temp_dict
+
+
+class LatencyStats():
+    '''
+    Collects how long each phase of scraping takes, to see where scrape time goes
+    '''
+
+    def __init__(self):
+        self.durations = {}
+        self.lock = threading.Lock()
+
+    def record(self, phase, seconds):
+        '''
+        Adds a measured duration to a phase
+
+        Args:
+            phase(str): name of phase
+            seconds(float): duration
+
+        Returns:
+
+        '''
+
+        with self.lock:
+            self.durations.setdefault(phase, []).append(seconds)
+
+    def report(self):
+        '''
+        Prints count, total, mean, median and max duration of each phase
+
+        Args:
+
+        Returns:
+
+        '''
+
+        print('Scraping latency per phase (seconds):')
+        for phase, values in self.durations.items():
+            values = sorted(values)
+            total = sum(values)
+            median = values[len(values) // 2]
+            print(f'    {phase}: count {len(values)}, total {total:.1f}, mean {total / len(values):.3f}, median {median:.3f}, max {values[-1]:.3f}')
+
+
+class RankingHistory():
+    '''
+    Rankings of every season scraped, one row per season and player with rank and points.
+    Columns are kept in typed arrays (array module) while scraping and saved as arrays of a .npz file, read by clean:
+        cleaning_functions.load_ranking_history('data/scraped_dataset/ranking_history.npz')
+    Players are ids of website, names are kept once per player.
+    '''
+
+    def __init__(self):
+        self.season = array('h')
+        self.player_id = array('i')
+        self.rank = array('i')
+        self.points = array('i')
+        self.names = {} #id of website -> name
+
+    def __len__(self):
+        return len(self.season)
+
+    def append(self, season, player_id, name, rank, points):
+        '''
+        Adds a row of a ranking table. Rows without a valid rank are skipped, missing points are stored as 0
+
+        Args:
+            season(int)
+            player_id(int): id of player in website
+            name(str): name of player
+            rank(int or str): as in table, for instance '1' or '12T'
+            points(int or str): as in table, for instance '11,830'
+
+        Returns:
+
+        '''
+
+        rank = re.sub(r'\D', '', str(rank))
+        if not rank or player_id < 0:
+            return
+
+        points = re.sub(r'\D', '', str(points))
+
+        self.season.append(int(season))
+        self.player_id.append(player_id)
+        self.rank.append(int(rank))
+        self.points.append(int(points) if points else 0)
+        self.names.setdefault(player_id, name)
+
+    def save(self, filepath):
+        '''
+        Saves columns as arrays of a .npz file
+
+        Args:
+            filepath(str): path of .npz file
+
+        Returns:
+
+        '''
+
+        import numpy as np #only needed once rankings are scraped
+
+        np.savez_compressed(filepath,
+                            season = np.frombuffer(self.season, dtype = np.int16),
+                            player_id = np.frombuffer(self.player_id, dtype = np.int32),
+                            rank = np.frombuffer(self.rank, dtype = np.int32),
+                            points = np.frombuffer(self.points, dtype = np.int32),
+                            ids = np.fromiter(self.names, dtype = np.int32, count = len(self.names)),
+                            names = np.array(list(self.names.values()), dtype = str))
+
+        print(f'{filepath} saved, {len(self)} rows of rankings')
+
+
 class Scrape():
     '''
     Collection of functions used for scraping the website  'https://www.ultimatetennisstatistics.com'
     '''
 
-    def __init__(self, driver):
+    REQUESTS_PER_PLAYER = 2 #player page, then stats tab loaded by its click
+
+    def __init__(self, driver, stats = None, timeout = 10):
         self.driver = driver
+        self.stats = stats if stats is not None else LatencyStats()
+        self.timeout = timeout
+
+
+    def wait_for(self, phase, condition):
+        '''
+        Waits until condition on driver is true instead of sleeping a fixed time, and records how long it took
+
+        Args:
+            phase(str): name of phase for latency stats
+            condition(callable): receives the driver, returns something truthy when page is ready
+
+        Returns:
+            boolean: False if timeout was reached before condition was true
+
+        '''
+
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.common.exceptions import TimeoutException
+
+        start = time.perf_counter()
+        try:
+            WebDriverWait(self.driver, self.timeout, poll_frequency = 0.1).until(condition)
+        except TimeoutException:
+            ready = False
+            phase = phase + ' (timeout)'
+        else:
+            ready = True
+
+        self.stats.record(phase, time.perf_counter() - start)
+        return ready
+
+
+    def close(self):
+        '''
+        Closes the browser
+
+        Args:
+
+        Returns:
+
+        '''
+
+        self.driver.quit()
+
+
+    def count_ranking_rows(self):
+        '''
+        Counts rows currently displayed in ranking table
+
+        Args:
+
+        Returns:
+            count(int)
+
+        '''
+
+        return len(self.driver.find_elements_by_css_selector(RANKING_ROWS))
 
 
     def select_year(self, year):
@@ -31,6 +342,8 @@ class Scrape():
 
         '''
 
+        from selenium.webdriver.support.ui import Select
+
         year = str(year)
         select = Select(self.driver.find_element_by_id('season'))
         select.select_by_value(year)
@@ -38,17 +351,24 @@ class Scrape():
     
     def extend_table(self):
         '''
-        Extends table of players in ranking to all
+        Extends table of players in ranking to all, unless it already shows all (choice is kept when season changes)
 
         Args:
 
         Returns:
+            extended(bool): False if table was already extended
 
 
         '''
 
+        option = self.driver.find_element_by_xpath('//*[@id="rankingsTable-header"]/div/div/div[5]/div[1]/ul/li[4]')
+        if 'active' in (option.get_attribute('class') or '').split():
+            return False
+
         self.driver.find_element_by_xpath('//*[@id="rankingsTable-header"]/div/div/div[5]/div[1]/button').click()
-        self.driver.find_element_by_xpath('//*[@id="rankingsTable-header"]/div/div/div[5]/div[1]/ul/li[4]/a').click()
+        option.find_element_by_tag_name('a').click()
+
+        return True
 
     
     
@@ -64,11 +384,13 @@ class Scrape():
         self.driver.find_element_by_xpath('//*[@id="statisticsPill"]').click()
 
 
-    def extract_players_url(self, players_urls):
+    def extract_players_url(self, players_urls, year = None, history = None):
         '''
         From ranking page, goes through html content, extracts all players links and adds to dictionary if new player found
         Args:
             players_urls(dict): dictionary of players in use
+            year(int): season displayed
+            history(RankingHistory): rankings of seasons, rank and points of page are added to it, optional
 
         Returns:
             players_urls(dict): dictionary of players updated
@@ -76,22 +398,7 @@ class Scrape():
 
         '''
     
-        page = self.driver.page_source
-        soup = BeautifulSoup(page, features="lxml")
-
-        players_html = soup.find('tbody').find_all('a')
-        for player in players_html:
-
-            if player.text in players_urls:
-                continue
-
-            else:
-                name = player.text
-                url_path = player['href']
-
-                players_urls[name] = url_path
-        
-        return players_urls
+        return parse_players_url(self.driver.page_source, players_urls, history, year)
 
 
     def get_player_profile(self):
@@ -106,30 +413,13 @@ class Scrape():
 
         '''
 
-    
-        temp_dict = {}
-        
-        page = self.driver.page_source
-        soup = BeautifulSoup(page ,features="lxml")
-        
-        try:
-            
-            player_html = soup.find_all('table', class_='table table-condensed text-nowrap')[0] #I keep only the first table
-        
-        except IndexError:
+        temp_dict = parse_player_profile(self.driver.page_source)
+
+        if temp_dict is None:
             print(f'There was a problem and data for this player  {self.driver.current_url} could not be retrieved')
             return 0
-        
-        else:
-            rows = player_html.find_all('tr')
-
-            for row in rows:
-                col_name = row.find('th').text
-                value = row.find('td').text
 
-                temp_dict[col_name] = value
-
-            return temp_dict
+        return temp_dict
 
     def get_player_stats(self):
         '''
@@ -142,66 +432,86 @@ class Scrape():
 
         '''
         
-        temp_dict = {}
         self.select_stats()
         
+        self.wait_for('stats_tables', lambda driver: len(driver.find_elements_by_css_selector(STATS_TABLES)) >= 3) #stats are loaded after click
         
-        time.sleep(1) #needed to get time to refresh and get soup
-        
-        page = self.driver.page_source
-        soup = BeautifulSoup(page, features="lxml")
-        
-        
-        
-
-        player_html = soup.find_all('table', class_='table table-condensed table-hover table-striped')
-        
-        for table in player_html[0:3]:#I want only first three tables
-            
-            
-
-            rows = table.find_all('tr')
+        return parse_player_stats(self.driver.page_source)
 
-            for row in rows[1:]: #first row is a header
 
-                col_name = row.find('td').text
-                value = row.find('th').text
-
-                temp_dict[col_name] = value
-            
-        return temp_dict
-
-
-    def scrape_players_urls(self, filepath, end_year = 2020, first_year = 1999):
+    def scrape_players_urls(self, filepath, end_year = 2020, first_year = 2000, history_path = None):
         '''
         From ranking page, goes through all years, extracts all unique players urls and saves them as a json file
         Args:
             filepath(str): filepath to save the json file
             end_year(int): by default 2020
-            first_year(int): by defaul 1999
+            first_year(int): by default 2000, included
+            history_path(str): filepath to save rankings of all years (RankingHistory), optional
         Returns:
 
 
 
         '''
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.common.by import By
+
         players_urls = {}
-        for year in range(end_year,first_year,-1):
-            time.sleep(3)
+        history = RankingHistory() if history_path is not None else None
+        for year in range(end_year, first_year - 1, -1):
+            self.wait_for('season_select', EC.element_to_be_clickable((By.ID, 'season')))
+            old_row = self.driver.find_elements_by_css_selector(RANKING_ROWS)[:1]
             self.select_year(year)
-            self.extend_table()
-            time.sleep(2)
-            players_urls = self.extract_players_url(players_urls)
+            if old_row:
+                self.wait_for('season_load', EC.staleness_of(old_row[0])) #table is rendered again with new season
+            self.wait_for('season_load', lambda driver: self.count_ranking_rows() > 0)
+
+            rows = self.count_ranking_rows()
+            if self.extend_table(): #no wait if table already showed all players
+                self.wait_for('extend_table', lambda driver: self.count_ranking_rows() != rows)
+            players_urls = self.extract_players_url(players_urls, year, history)
 
         with open(filepath, 'w') as fp:
             json.dump(players_urls, fp)
 
         print(f'{filepath} saved')
 
+        if history is not None:
+            history.save(history_path)
+
+    def scrape_player(self, player_url):
+        '''
+        Goes to a player page and scrapes profile and stats data
+
+        Args:
+            player_url(str): url of player page
+
+        Returns:
+            profile_dict(dict): dictionary with profile and stats data, 0 if there was an error
+
+        '''
+
+        start = time.perf_counter()
+        self.driver.get(player_url)
+        self.stats.record('player_page', time.perf_counter() - start)
+
+        profile_dict = self.get_player_profile() #scrape profile data
+
+        if profile_dict == 0: #this when there was an error
+            return 0
+
+        stats_dict = self.get_player_stats() #scrape stats data
+
+        profile_dict.update(stats_dict)
+
+        return profile_dict
+
     def scrape_players_info(self, main_url, filepath_url, filepath_info):
 
         '''
         Opens json file with info about url links to each player and scrapes all wanted information. Finally, saves all info in json.
+        Each player is appended to a PlayersJournal as soon as it is scraped.
         If error 429 for exceeding max number of requests, saves the info until that point. Next time it will continue at same place.
+        A player whose page is not found (error 404) is skipped.
 
         Args:
             main_url(str): main url
@@ -211,66 +521,465 @@ class Scrape():
     
         '''
 
-        count = 0
-        try:
-            df = pd.read_json(filepath_info)
-        except ValueError: #first time it does not exist
-            scraped_players = []
-            data = []
-        
-        else:
-            scraped_players = df.name.to_list()
-            data = list(df.to_dict('index').values()) #to get already scraped players
-        
-        finally:
+        journal = PlayersJournal(filepath_info)
+        scraped_players = journal.scraped_names()
+        profile_dict = None
 
-            with open(filepath_url, "r") as read_file:
-                players_urls = json.load(read_file)
+        with open(filepath_url, "r") as read_file:
+            players_urls = json.load(read_file)
 
 
+        with journal:
             for player, endpoint in tqdm.tqdm(players_urls.items()):
                 
                 if player in scraped_players:
                     continue
-                else:
                 
-                    
-                    player_url = main_url + endpoint
-                    self.driver.get(player_url)
+                player_url = main_url + endpoint
+
+                profile_dict = self.scrape_player(player_url)
 
-                    profile_dict = self.get_player_profile() #scrape profile data
+                if profile_dict == 0: #this when there was an error
+                    break
 
-                    if profile_dict == 0: #this when there was an error
+                if profile_dict is None: #page not found, player skipped
+                    continue
 
-                        with open(filepath_info, 'w') as fp:
-                            json.dump(data, fp)
-                            return False
+                profile_dict.update({'name': player})
 
-                    else:    
+                journal.append(profile_dict) #saved at once, a crash loses at most this player
 
-                        stats_dict = self.get_player_stats() #scrape stats data
+        journal.compact()
 
-                        
+        if profile_dict == 0:
+            return False
 
-                        profile_dict.update(stats_dict)
+        print(f'Done. {filepath_info} saved')
 
-                        profile_dict.update({'name': player})
 
-                        data.append(profile_dict)
-                        
 
-                        count += 1
+class HttpScrape(Scrape):
+    '''
+    Same scraping as Scrape but without browser: rankings and player tabs are requested as plain http fragments over a keep-alive session
+    and parsed with the same functions, so it produces the same dictionaries.
+    '''
 
-                        if count % 20 == 0:
+    RANKINGS_ENDPOINT = '/rankingsTableTable' #json data of ranking table
+    PROFILE_ENDPOINT = '/playerProfileTab' #html fragment with profile table
+    STATS_ENDPOINT = '/playerStatsTab' #html fragment with stats tables
+    PLAYER_ENDPOINT = '/playerProfile?playerId={}' #link of player page, as in ranking table
 
-                            with open(filepath_info, 'w') as fp:
-                                json.dump(data, fp)
+    REQUESTS_PER_PLAYER = 2 #profile tab and stats tab
 
-                            print(f'A save copy of {filepath_info} saved')
+    def __init__(self, main_url, session = None, stats = None, timeout = 10, pool_size = 10):
+        '''
+        Args:
+            main_url(str): main url, can be a local server with saved pages
+            session(requests.Session): session to reuse, optional
+            stats(LatencyStats): to collect latencies, optional
+            timeout(float): seconds to wait for a response
+            pool_size(int): max connections kept alive to main_url
+        '''
 
-                with open(filepath_info, 'w') as fp:
-                        json.dump(data, fp)
-                print(f'Done. {filepath_info} saved')
-                
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections = pool_size, pool_maxsize = pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+
+        self.main_url = main_url
+        self.session = session
+        self.stats = stats if stats is not None else LatencyStats()
+        self.timeout = timeout
+
+    def close(self):
+        '''
+        Closes the http session
+
+        Args:
+
+        Returns:
+
+        '''
+
+        self.session.close()
+
+    def get(self, phase, endpoint, params):
+        '''
+        Requests an endpoint of main url and records how long it took
+
+        Args:
+            phase(str): name of phase for latency stats
+            endpoint(str): endpoint
+            params(dict): query parameters
+
+        Returns:
+            response(requests.Response): None if max requests of website reached (error 429) or connection failed,
+                                         other errors (like 404) are returned for the caller to skip that page
+
+        '''
+
+        import requests
+
+        start = time.perf_counter()
+        try:
+            response = self.session.get(self.main_url + endpoint, params = params, timeout = self.timeout)
+        except requests.RequestException:
+            response = None
+        self.stats.record(phase, time.perf_counter() - start)
+
+        if response is None or response.status_code == 429:
+            return None
+
+        return response
+
+    def extract_players_url(self, players_urls, year = None, history = None):
+        '''
+        Requests ranking table of a season and adds players links to dictionary if new player found
+
+        Args:
+            players_urls(dict): dictionary of players in use
+            year(int): season
+            history(RankingHistory): rankings of seasons, rank and points of table are added to it, optional
+
+        Returns:
+            players_urls(dict): dictionary of players updated
+
+        '''
+
+        params = {'rankType': 'RANK', 'season': year, 'current': 1, 'rowCount': -1, 'sort[rank]': 'asc', 'searchPhrase': ''}
+        response = self.get('rankings', self.RANKINGS_ENDPOINT, params)
+
+        if response is None or response.status_code != 200:
+            print(f'There was a problem and ranking of {year} could not be retrieved')
+            return players_urls
+
+        for row in response.json()['rows']:
+            if history is not None:
+                history.append(year, int(row['playerId']), row['name'], row.get('rank', ''), row.get('points', ''))
+            if row['name'] not in players_urls:
+                players_urls[row['name']] = self.PLAYER_ENDPOINT.format(row['playerId'])
+
+        return players_urls
+
+    def scrape_players_urls(self, filepath, end_year = 2020, first_year = 2000, history_path = None):
+        '''
+        Requests ranking of all years, extracts all unique players urls and saves them as a json file
+        Args:
+            filepath(str): filepath to save the json file
+            end_year(int): by default 2020
+            first_year(int): by default 2000, included
+            history_path(str): filepath to save rankings of all years (RankingHistory), optional
+        Returns:
+
+        '''
+
+        players_urls = {}
+        history = RankingHistory() if history_path is not None else None
+        for year in range(end_year, first_year - 1, -1):
+            players_urls = self.extract_players_url(players_urls, year, history)
+
+        with open(filepath, 'w') as fp:
+            json.dump(players_urls, fp)
+
+        print(f'{filepath} saved')
+
+        if history is not None:
+            history.save(history_path)
+
+    def scrape_player(self, player_url):
+        '''
+        Requests profile and stats fragments of a player and scrapes all the data
+
+        Args:
+            player_url(str): url of player page, with playerId in query
+
+        Returns:
+            profile_dict(dict): dictionary with profile and stats data, 0 if max requests reached or connection failed (scraping stops),
+                                None if a page of player returned an error like 404 (player skipped)
+
+        '''
+
+        player_id = re.search(r'playerId=(\d+)', player_url).group(1)
+
+        tabs = {}
+        for phase, endpoint in [('profile_tab', self.PROFILE_ENDPOINT), ('stats_tab', self.STATS_ENDPOINT)]:
+            response = self.get(phase, endpoint, {'playerId': player_id})
+
+            if response is None:
+                print(f'There was a problem and data for this player  {player_url} could not be retrieved')
+                return 0
+
+            if response.status_code != 200: #page not found or similar, the rest of players can go on
+                print(f'Error {response.status_code} for player {player_url}, skipped')
+                return None
+
+            tabs[phase] = response.text
+
+        profile_dict = parse_player_profile(tabs['profile_tab'])
+
+        if profile_dict is None:
+            print(f'There was a problem and data for this player  {player_url} could not be retrieved')
+            return 0
+
+        profile_dict.update(parse_player_stats(tabs['stats_tab']))
+
+        return profile_dict
+
+
+class RateLimiter():
+    '''
+    Spaces out requests shared by several workers so that all together they never go above max_requests per period
+    '''
+
+    def __init__(self, max_requests, period = 60):
+        '''
+        Args:
+            max_requests(int): max number of requests allowed in period
+            period(float): seconds, by default one minute
+        '''
+
+        self.interval = period / max_requests
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self, n_requests = 1):
+        '''
+        Blocks calling worker until its turn to make requests comes
+
+        Args:
+            n_requests(int): requests the worker is about to make, each one takes its own share of period
+
+        Returns:
+
+        '''
+
+        with self.lock:
+            now = time.monotonic()
+            turn = max(now, self.next_time)
+            self.next_time = turn + n_requests * self.interval
+
+        if turn > now:
+            time.sleep(turn - now)
+
+
+class PlayersJournal():
+    '''
+    Append-only checkpoint of scraped players: one json line per player, flushed as soon as it is written.
+    Cost of a checkpoint does not grow with number of players. compact() turns it into the final players_info.json.
+    '''
+
+    def __init__(self, filepath_info, journal_path = None):
+        '''
+        Args:
+            filepath_info(str): filepath of json file with players info, written by compact()
+            journal_path(str): filepath of journal, by default filepath_info with .jsonl extension
+        '''
+
+        self.filepath_info = filepath_info
+        self.journal_path = journal_path if journal_path is not None else os.path.splitext(filepath_info)[0] + '.jsonl'
+        self.fp = None
+
+    def read(self):
+        '''
+        Reads all players in journal. If there is no journal yet but a players_info.json from before, journal starts from it.
+
+        Args:
+
+        Returns:
+            data(list): list of dictionaries with players info
+
+        '''
+
+        if not os.path.exists(self.journal_path):
+            try:
+                with open(self.filepath_info, 'r') as fp:
+                    data = json.load(fp)
+            except (OSError, ValueError): #first time it does not exist
+                data = []
+
+            with open(self.journal_path, 'w') as fp:
+                for record in data:
+                    fp.write(json.dumps(record) + '\n')
+
+            return data
+
+        data = []
+        with open(self.journal_path, 'r') as fp:
+            for line in fp:
+                try:
+                    data.append(json.loads(line))
+                except ValueError: #last line cut by a crash
+                    continue
+
+        return data
+
+    def scraped_names(self):
+        '''
+        Names of players already in journal, to continue at same place
+
+        Args:
+
+        Returns:
+            names(set)
+
+        '''
+
+        return {record.get('name') for record in self.read()}
+
+    def __enter__(self):
+        self.fp = open(self.journal_path, 'a+')
+        self.fp.seek(0, os.SEEK_END)
+        if self.fp.tell() > 0:
+            self.fp.seek(self.fp.tell() - 1)
+            if self.fp.read(1) != '\n': #line cut by a crash, new record starts in its own line
+                self.fp.write('\n')
+        return self
+
+    def __exit__(self, *exc):
+        self.fp.close()
+        self.fp = None
+
+    def append(self, record):
+        '''
+        Writes a player at the end of journal and flushes it to disk
+
+        Args:
+            record(dict): player info
+
+        Returns:
+
+        '''
+
+        self.fp.write(json.dumps(record) + '\n')
+        self.fp.flush()
+        os.fsync(self.fp.fileno())
+
+    def compact(self):
+        '''
+        Saves all players in journal as a json list in filepath_info, keeping last record of each player
+
+        Args:
+
+        Returns:
+            data(list): list of dictionaries with players info
+
+        '''
+
+        players = {}
+        for record in self.read():
+            players[record.get('name')] = record
+        data = list(players.values())
+
+        temp_path = self.filepath_info + '.tmp'
+        with open(temp_path, 'w') as fp:
+            json.dump(data, fp)
+        os.replace(temp_path, self.filepath_info) #never leaves a half written file
+
+        return data
+
+
+def scrape_players_info_parallel(main_url, filepath_url, filepath_info, n_workers = 4, max_requests = 60, period = 60, driver_factory = None, stats = None, scraper_factory = None):
+    '''
+    Same as Scrape.scrape_players_info but with n_workers, each one with its own driver (or http session), taking players from a shared queue.
+    A RateLimiter shared by all workers keeps total requests under max_requests per period, to stay away from error 429.
+    If a worker gets an error, all workers stop and info scraped until that point is saved. Next time it will continue at same place.
+    A player whose page is not found (error 404) is skipped and the rest go on, next time it is tried again.
+
+    Args:
+        main_url(str): main url
+        filepath_url(str): filepath to json file with url info
+        filepath_info(str): filepath to save json file with players info
+        n_workers(int): number of drivers scraping at the same time
+        max_requests(int): max number of requests to website in period among all workers, each player takes REQUESTS_PER_PLAYER of them
+        period(float): seconds
+        driver_factory(callable): returns a new webdriver, by default selenium webdriver.Chrome
+        stats(LatencyStats): shared by all workers to collect their latencies, optional
+        scraper_factory(callable): returns a new scraper (Scrape or HttpScrape), by default a Scrape with a driver from driver_factory
+
+    Returns:
+        boolean: False if scraping stopped because of an error
+
+    '''
+
+    journal = PlayersJournal(filepath_info)
+    scraped_players = journal.scraped_names()
+
+    with open(filepath_url, "r") as read_file:
+        players_urls = json.load(read_file)
+
+    players_queue = queue.Queue()
+    for player, endpoint in players_urls.items():
+        if player not in scraped_players:
+            players_queue.put((player, endpoint))
+
+    if scraper_factory is None:
+        if driver_factory is None:
+            from selenium import webdriver
+            driver_factory = webdriver.Chrome
+        scraper_factory = lambda: Scrape(driver_factory(), stats)
+
+    limiter = RateLimiter(max_requests, period)
+    stop = threading.Event()
+    lock = threading.Lock()
+    progress = tqdm.tqdm(total = players_queue.qsize())
+
+    def worker():
+        try:
+            scraper = scraper_factory()
+        except Exception as error: #for instance, browser could not start
+            print(f'A worker could not start: {type(error).__name__}: {error}')
+            stop.set()
+            return
+
+        try:
+            while not stop.is_set():
+                try:
+                    player, endpoint = players_queue.get_nowait()
+                except queue.Empty:
+                    return
+
+                start = time.perf_counter()
+                limiter.wait(scraper.REQUESTS_PER_PLAYER) #one turn per request to website, not per player
+                if stats is not None:
+                    stats.record('rate_limit', time.perf_counter() - start)
+                profile_dict = scraper.scrape_player(main_url + endpoint)
+
+                if profile_dict == 0: #this when there was an error
+                    stop.set()
+                    return
+
+                if profile_dict is None: #page not found, player skipped
+                    with lock:
+                        progress.update(1)
+                    continue
+
+                profile_dict.update({'name': player})
+
+                with lock:
+                    journal.append(profile_dict) #saved at once, a crash loses at most this player
+                    progress.update(1)
+        except Exception as error: #player not saved, next run starts again from it
+            print(f'A worker stopped: {type(error).__name__}: {error}')
+            stop.set()
+        finally:
+            scraper.close()
+
+    threads = [threading.Thread(target = worker) for _ in range(n_workers)]
+    with journal:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    progress.close()
+    journal.compact()
 
+    if stop.is_set() or not players_queue.empty(): #players left if workers stopped
+        return False
 
+    print(f'Done. {filepath_info} saved')
+    return True
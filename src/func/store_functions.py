@@ -0,0 +1,143 @@
+import os
+import glob
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from src.func.cleaning_functions import CATEGORICAL_COLUMNS
+
+
+'''
+Collection of functions used for storing clean games partitioned by season, so readers only open seasons (and row groups) they need
+'''
+
+
+#Folders of the store, one level per column: data/matches/Season=2010/part-0.parquet. A Tour column can be added in front when there is more than one tour
+PARTITIONS = ['Season']
+
+PARTITIONING = ds.partitioning(pa.schema([('Season', pa.int16())]), flavor = 'hive')
+
+#Rows sorted by these columns inside each season, so min/max statistics of row groups let readers skip most of them
+SORT_COLUMNS = ['Player', 'Surface', 'Date']
+
+ROW_GROUP_ROWS = 16384
+
+
+def save_matches(df, root):
+    '''
+    Writes games partitioned by season, replacing any previous store. Date column is stored as date, Season is its year (0 if unknown)
+
+    Args:
+        df(DataFrame): clean games, Date as 'dd/mm/yyyy' or datetime
+        root(str): folder of the store
+
+    Returns:
+
+    '''
+
+    df = df.copy()
+    if not pd.api.types.is_datetime64_any_dtype(df.Date):
+        df['Date'] = pd.to_datetime(df.Date, dayfirst = True, errors = 'coerce')
+    df['Season'] = df.Date.dt.year.fillna(0).astype('int16')
+
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+
+    df = df.sort_values(PARTITIONS + [column for column in SORT_COLUMNS if column in df.columns], kind = 'stable')
+
+    #written next to old store and swapped at the end, readers never see half a store
+    temp_root = f'{root}.{os.getpid()}.tmp'
+    ds.write_dataset(pa.Table.from_pandas(df, preserve_index = False), temp_root, format = 'parquet', partitioning = PARTITIONING,
+                     max_rows_per_group = ROW_GROUP_ROWS, min_rows_per_group = min(ROW_GROUP_ROWS, 1024), existing_data_behavior = 'delete_matching')
+
+    if os.path.exists(root):
+        shutil.rmtree(root)
+    os.replace(temp_root, root)
+
+
+def store_files(root, start = None, end = None):
+    '''
+    Parquet files of a store, or of seasons between start and end only, to fingerprint them as input of a stage
+
+    Args:
+        root(str): folder of the store
+        start(int): first season, optional
+        end(int): last season, optional
+
+    Returns:
+        paths(list)
+
+    '''
+
+    paths = []
+    for folder in sorted(glob.glob(os.path.join(root, 'Season=*'))):
+        season = int(folder.rsplit('=', 1)[-1])
+        if (start is None or season >= start) and (end is None or season <= end):
+            paths += sorted(glob.glob(os.path.join(folder, '*.parquet')))
+
+    return paths
+
+
+def match_filter(start = None, end = None, surface = None, player = None, opponent = None):
+    '''
+    Filter expression of games. Season bounds prune partitions, the rest is checked against row group statistics and then rows
+
+    Args:
+        start(int, str or Timestamp): year (from its first day) or first day, optional
+        end(int, str or Timestamp): year (until its last day) or last day, optional
+        surface(str or list): surfaces, optional
+        player(int or list): ids in Player column (PlayerRegistry), optional
+        opponent(int or list): ids in Opponent column, optional
+
+    Returns:
+        expression(pyarrow.dataset.Expression): None if no filter
+
+    '''
+
+    conditions = []
+
+    if start is not None:
+        start = pd.Timestamp(f'{start}-01-01') if isinstance(start, int) else pd.Timestamp(start)
+        conditions += [ds.field('Season') >= start.year, ds.field('Date') >= start]
+
+    if end is not None:
+        end = pd.Timestamp(f'{end}-12-31') if isinstance(end, int) else pd.Timestamp(end)
+        conditions += [ds.field('Season') <= end.year, ds.field('Date') <= end]
+
+    for column, values in [('Surface', surface), ('Player', player), ('Opponent', opponent)]:
+        if values is not None:
+            values = list(values) if isinstance(values, (list, tuple, set)) else [values]
+            conditions.append(ds.field(column).isin(values))
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    return expression
+
+
+def read_matches(root, start = None, end = None, surface = None, player = None, opponent = None, columns = None):
+    '''
+    Reads games of a store, opening only seasons between start and end and row groups which may hold rows of the filter
+
+        read_matches('data/matches', start = 2010, surface = 'Clay', opponent = registry.ids['Novak Djokovic'])
+
+    Args:
+        root(str): folder of the store
+        start(int, str or Timestamp): year (from its first day) or first day, optional
+        end(int, str or Timestamp): year (until its last day) or last day, optional
+        surface(str or list): surfaces, optional
+        player(int or list): ids in Player column (PlayerRegistry), optional
+        opponent(int or list): ids in Opponent column, optional
+        columns(list): columns to read, all if None
+
+    Returns:
+        df(DataFrame): games, Date as datetime
+
+    '''
+
+    dataset = ds.dataset(root, format = 'parquet', partitioning = PARTITIONING)
+    table = dataset.to_table(columns = columns, filter = match_filter(start, end, surface, player, opponent))
+
+    return table.to_pandas()
@@ -1,35 +1,101 @@
-import pandas as pd
+import os
+from src.func.render_functions import render_charts
 from src.func.plotting_functions import Plot as myplot
+from src.func.pipeline_functions import Pipeline, Stage
 
 
-print('Plotting graphs....')
+def plot(main_player = 'Rafael Nadal', agg_df = None, df_players = None,
+         aggregates_path = 'data/dataset_aggregates.parquet',
+         clean_players_path = 'data/players_stats_clean.parquet',
+         output_dir = 'output/img',
+         image_cache_dir = 'data/image_cache',
+         n_workers = None, force = False,
+         first_year = None, last_year = None, matches_path = 'data/matches',
+         players_registry_path = 'data/players_registry.parquet'):
+    '''
+    Creates all plots of the report, each one in its own process. Only plots whose dataset, plotting code or player changed are drawn again.
+    With agg_df and df_players given (as returned by clean), plots are drawn from those frames, otherwise each plot loads only its columns from disk.
+    With first_year or last_year, plots of games are drawn from seasons in that range of the store of games, reading only those seasons.
 
-#Load dataset games
-clean_dataset_path = 'data/dataset_clean.pkl'
-df = pd.read_pickle(clean_dataset_path)
+    Args:
+        main_player(str): player to study, name as in players stats
+        agg_df(DataFrame): aggregated dataset in memory, same content as aggregates_path, optional
+        df_players(DataFrame): players stats in memory, same content as clean_players_path, optional
+        aggregates_path(str): path of aggregated dataset
+        clean_players_path(str): path of players stats
+        output_dir(str): folder to save plots
+        image_cache_dir(str): flags and pictures resized once, reused by later runs
+        n_workers(int): number of processes, by default number of cores
+        force(bool): draw all plots even if up to date
+        first_year(int): first season of games plotted, optional
+        last_year(int): last season of games plotted, optional
+        matches_path(str): folder of games partitioned by season, written by clean
+        players_registry_path(str): path of names of player ids, written by clean
 
-#Load dataset player stats
-clean_players_path = 'data/players_stats_clean.pkl'
-df_players = pd.read_pickle(clean_players_path)
+    Returns:
+        times(dict): Keys: plot, Values: seconds to create it, or error message if it failed
 
-#Plots wins/loses based on surface
-myplot.plot_surface_win(df)
+    '''
 
-#Plots loses details
-myplot.plot_losses_detail(df)
+    print('Plotting graphs....')
 
+    in_memory = agg_df is not None and df_players is not None #frames just saved by clean, same content as files
 
-#plots most defeated nationalities
-myplot.plot_top_countries_defeated(df)
+    #Each chart is rendered in its own process: name of Plot method, dataset path, extra arguments
+    jobs = [('plot_surface_win', aggregates_path, {'output_dir': output_dir}), #Plots wins/loses based on surface
+            ('plot_losses_detail', aggregates_path, {'output_dir': output_dir}), #Plots loses details
+            ('plot_top_countries_defeated', aggregates_path, {'output_dir': output_dir}), #plots most defeated nationalities
+            ('plot_top_nemesis', aggregates_path, {'output_dir': output_dir}), #plots top nemesis players
+            ('plot_box_aces', clean_players_path, {'main_player': main_player, 'output_dir': output_dir})] #plots stats aces all players
 
-#plots top nemesis players
-myplot.plot_top_nemesis(df)
+    #A chart is drawn again only if its dataset, plotting code or player changed, or its image is missing
+    plot_code = ['src/func/plotting_functions.py', 'src/func/image_cache.py']
+    charts = {plot_name: Stage(plot_name, [path], [f'{output_dir}/{myplot.FILENAMES[plot_name]}'], plot_code, params = kwargs) for plot_name, path, kwargs in jobs}
 
-#plots stats aces all players
-myplot.plot_box_aces(df_players)
+    seasons = first_year is not None or last_year is not None
+    if seasons: #plots of games depend on files of those seasons only
+        from src.func.store_functions import store_files
 
-print('Plots created!\n')
+        season_files = store_files(matches_path, first_year, last_year)
+        for plot_name, path, kwargs in jobs:
+            if path == aggregates_path:
+                charts[plot_name].inputs = season_files
+                charts[plot_name].params = dict(kwargs, first_year = first_year, last_year = last_year)
 
+    if os.path.exists(players_registry_path): #shows names of opponents, datasets saved with names do not need it
+        charts['plot_top_nemesis'].inputs = charts['plot_top_nemesis'].inputs + [players_registry_path]
 
+    pipeline = Pipeline()
+    if not force:
+        outdated = [stage.name for stage in pipeline.outdated(charts.values())]
+        jobs = [job for job in jobs if job[0] in outdated]
 
+    if seasons and any(path == aggregates_path for plot_name, path, kwargs in jobs):
+        from src.func.store_functions import read_matches
+        from src.func.cleaning_functions import AGGREGATE_KEYS, build_aggregates
 
+        agg_df = build_aggregates(read_matches(matches_path, first_year, last_year, columns = AGGREGATE_KEYS + ['Is_winner']))
+        jobs = [(plot_name, agg_df if path == aggregates_path else path, kwargs) for plot_name, path, kwargs in jobs]
+
+    elif in_memory: #no need to read again what clean has just written
+        jobs = [(plot_name, df_players if path == clean_players_path else agg_df, kwargs) for plot_name, path, kwargs in jobs]
+
+    times = render_charts(jobs, n_workers, image_cache_dir, players_registry_path) if jobs else {}
+
+    for plot_name in myplot.FILENAMES:
+        result = times.get(plot_name)
+        if result is None:
+            print(f'{plot_name} is up to date, skipped')
+        elif isinstance(result, str):
+            print(f'{plot_name} failed: {result}')
+        else:
+            pipeline.mark_done(charts[plot_name])
+            print(f'{plot_name} rendered in {result:.2f} s')
+
+    failed = [plot_name for plot_name, result in times.items() if isinstance(result, str)]
+    if failed:
+        print(f'{len(failed)} of {len(myplot.FILENAMES)} plots failed!\n')
+    else:
+        print('Plots created!\n')
+
+    return times
@@ -0,0 +1,55 @@
+import os
+import pandas as pd
+import src.func.cleaning_functions as cleaning
+from src.func.rating_functions import EloRatings
+
+
+def ratings(kaggle_dataset_path = 'data/kaggle_dataset/Data.csv',
+            match_ratings_path = 'data/match_elo.parquet',
+            players_ratings_path = 'data/players_elo.parquet',
+            rebuild = False):
+    '''
+    Elo and surface Elo of all players from whole Kaggle dataset. Only games appended to csv file since last run are rated,
+    starting from saved ratings of players.
+
+    Ratings before each game are saved by match_id, to join them to clean games:
+        rating_functions.join_ratings(clean_df, pd.read_parquet('data/match_elo.parquet'))
+
+    Args:
+        kaggle_dataset_path(str): path csv file with games from Kaggle
+        match_ratings_path(str): path to save ratings of both players before each game
+        players_ratings_path(str): path to save current ratings of players
+        rebuild(bool): rate all games again, needed if old games of csv file were changed
+
+    Returns:
+        match_ratings(DataFrame): ratings before each game, indexed by match_id
+        players_ratings(DataFrame): current ratings of players
+
+    '''
+
+    print('Rating players')
+
+    df = cleaning.read_kaggle_dataset(kaggle_dataset_path)
+
+    incremental = not rebuild and os.path.exists(match_ratings_path) and os.path.exists(players_ratings_path)
+    if incremental:
+        old = pd.read_parquet(match_ratings_path)
+        incremental = len(old) == 0 or df.index.max() >= old.index.max() #csv was replaced by a shorter one otherwise
+
+    if incremental:
+        elo = EloRatings.from_table(pd.read_parquet(players_ratings_path))
+        df = df.loc[df.index > old.index.max()] if len(old) else df #games appended since last run
+    else:
+        old = None
+        elo = EloRatings()
+
+    new = elo.update(df)
+    match_ratings = pd.concat([old, new]) if old is not None else new
+
+    match_ratings.to_parquet(match_ratings_path)
+    players_ratings = elo.table()
+    players_ratings.to_parquet(players_ratings_path, index = False)
+
+    print(f'{len(new)} games rated. Ratings saved in {match_ratings_path} and {players_ratings_path}.\n')
+
+    return match_ratings, players_ratings
@@ -1,34 +1,68 @@
-from selenium import webdriver
 from src.func.scraping_functions import Scrape as scrape
+from src.func.scraping_functions import HttpScrape
+from src.func.scraping_functions import scrape_players_info_parallel
 
 #how I installed Selenium
 #https://tecadmin.net/setup-selenium-chromedriver-on-ubuntu/
 
 
-main_url = 'https://www.ultimatetennisstatistics.com'
-endpoint = '/rankingsTable'
-ranking_url = main_url + endpoint
+def scrape_players(backend = 'selenium', n_workers = 4, max_requests_minute = 60, first_year = 2000, end_year = 2020,
+                   main_url = 'https://www.ultimatetennisstatistics.com',
+                   players_url_path = 'data/scraped_dataset/players_url.json',
+                   players_info_path = 'data/scraped_dataset/players_info.json',
+                   ranking_history_path = 'data/scraped_dataset/ranking_history.npz'):
+    '''
+    Scrapes links of players found in rankings and then their info, saving both in json files
 
-scraper = scrape(webdriver.Chrome()) #creates the driver Objetct
+    Args:
+        backend(str): 'http' requests page fragments without browser, 'selenium' drives Chrome
+        n_workers(int): number of browsers (or http sessions) scraping players info at the same time. Set to 1 to use a single one
+        max_requests_minute(int): requests to website per minute among all workers (two per player), to stay under max requests of website
+        first_year(int): first season of rankings scraped
+        end_year(int): last season of rankings scraped
+        main_url(str): url of website
+        players_url_path(str): path to save json file with links of players
+        players_info_path(str): path to save json file with actual players info
+        ranking_history_path(str): path to save rank and points of players in each season, from the same ranking tables
 
-scraper.driver.get(ranking_url) #goes to ranking page
+    Returns:
+        response(boolean): False if scraping of players info stopped before the end
 
-players_url_path = 'data/scraped_dataset/players_url.json' #path to save json file
+    '''
 
-print('Start scraping players urls')
+    ranking_url = main_url + '/rankingsTable'
 
-scraper.scrape_players_urls(players_url_path) #scrapes links of all players found in ranking between 2020 and 2000
+    if backend == 'http':
+        scraper = HttpScrape(main_url) #creates the http session
+    else:
+        from selenium import webdriver #only needed by this backend
 
+        scraper = scrape(webdriver.Chrome()) #creates the driver Objetct
 
+        scraper.driver.get(ranking_url) #goes to ranking page
 
-players_info_path = 'data/scraped_dataset/players_info.json' #path to save json file with actual players info
+    print('Start scraping players urls')
 
-print('Start scraping players info')
+    scraper.scrape_players_urls(players_url_path, end_year, first_year, ranking_history_path) #scrapes links of all players found in ranking between both years, and their rankings
 
-response = scraper.scrape_players_info(main_url, players_url_path, players_info_path)  #scrapes info and saves them in json file
 
-if response == False:
-    print('Problem when scraping players info. Most likely reached max requests of website. Retry about an hour later. Progress saved.\n')
-else:
-    print('Scrape of players stats done.\n')
+    print('Start scraping players info')
 
+    if n_workers > 1:
+        scraper.close() #each worker opens its own browser or session
+        if backend == 'http':
+            scraper_factory = lambda: HttpScrape(main_url, stats = scraper.stats)
+        else:
+            scraper_factory = None
+        response = scrape_players_info_parallel(main_url, players_url_path, players_info_path, n_workers, max_requests_minute, stats = scraper.stats, scraper_factory = scraper_factory)  #scrapes info and saves them in json file
+    else:
+        response = scraper.scrape_players_info(main_url, players_url_path, players_info_path)  #scrapes info and saves them in json file
+
+    if response == False:
+        print('Problem when scraping players info. Most likely reached max requests of website. Retry about an hour later. Progress saved.\n')
+    else:
+        print('Scrape of players stats done.\n')
+
+    scraper.stats.report() #where scraping time went
+
+    return response
@@ -0,0 +1,65 @@
+import os
+import threading
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+
+'''
+Local stand-in for https://www.ultimatetennisstatistics.com serving saved pages, to run HttpScrape offline
+'''
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    '''
+    Maps a request to a saved file in directory:
+        /playerProfileTab?playerId=4742    -> playerProfileTab/4742.html
+        /playerStatsTab?playerId=4742      -> playerStatsTab/4742.html
+        /rankingsTableTable?season=2020    -> rankingsTableTable/2020.json
+    '''
+
+    KEYS = ['playerId', 'season'] #query parameter which identifies the saved file
+
+    def translate_path(self, path):
+
+        url = urlsplit(path)
+        query = parse_qs(url.query)
+        endpoint = url.path.strip('/')
+
+        for key in self.KEYS:
+            if key in query:
+                extension = '.json' if key == 'season' else '.html'
+                return os.path.join(self.directory, endpoint, query[key][0] + extension)
+
+        return os.path.join(self.directory, endpoint)
+
+    def log_message(self, format, *args):
+        pass #keep scraping output clean
+
+
+class FixtureServer():
+    '''
+    Serves saved pages of a directory in a background thread. To use as context manager:
+
+        with FixtureServer('fixtures') as server:
+            scraper = HttpScrape(server.url)
+    '''
+
+    def __init__(self, directory, port = 0):
+        '''
+        Args:
+            directory(str): folder with saved pages
+            port(int): by default any free port
+        '''
+
+        handler = lambda *args, **kwargs: FixtureHandler(*args, directory = directory, **kwargs)
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+        self.thread = threading.Thread(target = self.httpd.serve_forever, daemon = True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,103 @@
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from src.func.scraping_functions import HttpScrape, scrape_players_info_parallel, parse_player_profile, parse_player_stats
+from fixture_server import FixtureServer
+
+
+'''
+HttpScrape run offline against saved pages of tests/fixtures/http served by FixtureServer. Run from repo root:
+    python -m pytest tests
+'''
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'http')
+
+
+def read_fixture(*path):
+
+    with open(os.path.join(FIXTURES, *path), 'r') as fp:
+        return fp.read()
+
+
+@pytest.fixture
+def server():
+
+    with FixtureServer(FIXTURES) as server:
+        yield server
+
+
+@pytest.mark.parametrize('player_id', ['4742', '4920'])
+def test_scrape_player_same_as_parsers(server, player_id):
+
+    expected = parse_player_profile(read_fixture('playerProfileTab', f'{player_id}.html'))
+    expected.update(parse_player_stats(read_fixture('playerStatsTab', f'{player_id}.html')))
+
+    scraper = HttpScrape(server.url)
+    try:
+        profile_dict = scraper.scrape_player(server.url + HttpScrape.PLAYER_ENDPOINT.format(player_id))
+    finally:
+        scraper.close()
+
+    assert profile_dict == expected
+    assert profile_dict['Country'] == ('Spain' if player_id == '4742' else 'Serbia')
+    assert 'Not kept' not in profile_dict #only first three stats tables
+
+
+def test_scrape_player_missing_page(server):
+
+    scraper = HttpScrape(server.url)
+    try:
+        assert scraper.scrape_player(server.url + HttpScrape.PLAYER_ENDPOINT.format(9999)) is None #404 skips player, does not stop
+    finally:
+        scraper.close()
+
+
+def test_scrape_players_info_skips_missing_page(server, tmp_path):
+
+    urls_path = tmp_path / 'players_url.json'
+    info_path = tmp_path / 'players_info.json'
+    players_urls = {'Rafael Nadal': HttpScrape.PLAYER_ENDPOINT.format(4742),
+                    'Missing Player': HttpScrape.PLAYER_ENDPOINT.format(9999),
+                    'Novak Djokovic': HttpScrape.PLAYER_ENDPOINT.format(4920)}
+
+    with open(urls_path, 'w') as fp:
+        json.dump(players_urls, fp)
+
+    done = scrape_players_info_parallel(server.url, str(urls_path), str(info_path), n_workers = 1, max_requests = 600,
+                                        scraper_factory = lambda: HttpScrape(server.url))
+
+    with open(info_path, 'r') as fp:
+        players_info = json.load(fp)
+
+    assert done
+    assert sorted(player['name'] for player in players_info) == ['Novak Djokovic', 'Rafael Nadal']
+
+
+def test_scrape_players_urls(server, tmp_path):
+
+    urls_path = tmp_path / 'players_url.json'
+    history_path = tmp_path / 'ranking_history.npz'
+
+    scraper = HttpScrape(server.url)
+    try:
+        scraper.scrape_players_urls(str(urls_path), end_year = 2020, first_year = 2020, history_path = str(history_path))
+    finally:
+        scraper.close()
+
+    with open(urls_path, 'r') as fp:
+        players_urls = json.load(fp)
+
+    assert players_urls == {'Novak Djokovic': '/playerProfile?playerId=4920',
+                            'Rafael Nadal': '/playerProfile?playerId=4742',
+                            'Missing Player': '/playerProfile?playerId=9999'}
+
+    with np.load(history_path) as history:
+        assert history['season'].tolist() == [2020] * 3
+        assert history['rank'].tolist() == [1, 2, 3]
+        assert history['points'].tolist() == [12030, 9850, 9125]